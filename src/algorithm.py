@@ -1,23 +1,37 @@
 import copy
+import math
 import random
 from helper import return_cycle_time
+from representation import Schedule, get_intersection_demand, get_street_demand
+from surrogate import SurrogateModel, get_features, get_ranking_accuracy
+from congestion import CongestionIndex, LoadSampler
 import time
 
+# Number of full evaluations done by this process, used for progress reporting
+evaluation_count = 0
 
-def init_solution(streets, number_of_intersections, duration):
+# Time budget of a run in seconds when none is given
+DEFAULT_TIME_LIMIT = 3*60
+
+
+def init_solution(streets, number_of_intersections, duration, rng=random, demand=None):
     """Get initial solution
 
     Args:
         streets (dict): Street object
         number_of_intersections (int): Number of intersections
         duration (int): Duration of simulation
+        rng (random.Random, optional): Random number generator. Defaults to the global random module.
+        demand (list, optional): Number of demanded streets per intersection, biases the cycle times
+            towards short, demand-proportional ones. Defaults to None.
 
     Returns:
-        list: Intersection/solution data
+        Schedule: Intersection/solution data
     """
     intersections = [[] for _ in range(number_of_intersections)]
     for i in range(0, len(intersections)):
-        cycle_time = return_cycle_time(duration)
+        cycle_time = return_cycle_time(
+            duration, rng, demand[i] if demand is not None else None)
         # How much of the time has been allocated per intersection
         sum_per_intersection = 0
         for key, value in streets.items():
@@ -31,7 +45,7 @@ def init_solution(streets, number_of_intersections, duration):
 
                 if not exists:
                     # Allocate random time based on how much time is left
-                    duration_per_street = random.randint(
+                    duration_per_street = rng.randint(
                         0, cycle_time - sum_per_street)
                     intersections[i].append({
                         'street': key,
@@ -43,15 +57,16 @@ def init_solution(streets, number_of_intersections, duration):
         intersections[i][-1]['duration'] = max(
             cycle_time - sum_per_intersection, 0)
 
-    return intersections
+    return Schedule(intersections)
 
 
-def get_green_light(intersection, current_time):
+def get_green_light(intersection, current_time, cycle_time=None):
     """Get the currently green street and its remaining duration at the given current time.
 
     Args:
         intersection (list): List of streets at the intersection, each represented as a dictionary with 'street' and 'duration' keys.
         current_time (int): Current time in the simulation.
+        cycle_time (int, optional): Cycle time of the intersection if already known. Defaults to None.
 
     Returns:
         tuple: A tuple containing the currently green street and its remaining duration.
@@ -60,7 +75,8 @@ def get_green_light(intersection, current_time):
               and green_duration is the remaining duration for which the street is green.
 
     """
-    cycle_time = sum(street['duration'] for street in intersection)
+    if cycle_time is None:
+        cycle_time = sum(street['duration'] for street in intersection)
 
     # Check if cycle_time is zero (no valid streets with non-zero duration)
     if cycle_time == 0:
@@ -90,17 +106,93 @@ def get_green_light(intersection, current_time):
     return None, 0
 
 
-def evaluate_solution(input_data, solution):
+def simulate_car(car, streets, solution, duration, congestion=None):
+    """Simulate a single car driving its path under the given solution.
+
+    Args:
+        car (dict): Car information data.
+        streets (dict): Street information.
+        solution (list): Solution list containing the intersection schedules.
+        duration (int): Duration of simulation.
+        congestion (CongestionIndex, optional): Index recording the time the car waits at red lights. A car stranded
+            at a light that never turns green for it waits there until the end of the simulation. Defaults to None.
+
+    Returns:
+        int: Time at which the car reaches its destination, None if it does not finish.
+    """
+    path = car['path']
+    remaining_time = car['remaining_time']
+    # Schedules know their cycle times, plain lists of intersections have them summed per light
+    cycle_times = getattr(solution, 'cycle_times', None)
+
+    # The car can only finish if its final street has a schedule at its intersection
+    final_end = streets[car['final']]['end']
+    final_intersection = solution[final_end] if final_end < len(
+        solution) else False
+    if not final_intersection or car['final'] not in [street['street'] for street in final_intersection]:
+        # The car never finishes, which counts as waiting for the whole simulation
+        if congestion is not None:
+            congestion.record_wait(car['final'], final_end, duration)
+        return None
+
+    current_time = 0
+    current_street_index = 0
+    # Time the car has been waiting at the current light
+    waiting_time = 0
+    while current_time < duration:
+        # Even without waiting at any light the car would not make it in time
+        if current_time + remaining_time[current_street_index] >= duration:
+            break
+
+        street_name = path[current_street_index]
+        end = streets[street_name]['end']
+        intersection = solution[end] if end < len(solution) else False
+        green_street = None
+        if intersection and street_name in [street['street'] for street in intersection]:
+            green_street, green_duration = get_green_light(
+                intersection, current_time, cycle_times[end] if cycle_times is not None else None)
+        if green_street is None:
+            # The light never turns green, so the car waits until the end of the simulation
+            if congestion is not None:
+                congestion.record_wait(street_name, end, duration - current_time)
+            return None
+
+        if green_street == street_name:
+            if congestion is not None and waiting_time:
+                congestion.record_wait(street_name, end, waiting_time)
+                waiting_time = 0
+            current_street_index = (current_street_index + 1) % len(path)
+            current_time += streets[path[current_street_index]]['length']
+            if current_street_index == len(path) - 1 and current_time < duration:
+                return current_time
+        else:
+            waiting_time += green_duration
+            current_time += green_duration
+
+    # The car is still waiting at a light when it is given up on
+    if congestion is not None and waiting_time:
+        street_name = path[current_street_index]
+        congestion.record_wait(street_name, streets[street_name]['end'],
+                               min(waiting_time, duration - (current_time - waiting_time)))
+    return None
+
+
+def evaluate_solution(input_data, solution, congestion=None):
     """Evaluate a solution based on the given input data.
 
     Args:
         input_data (dict): Input data dictionary containing 'bonus', 'streets', 'cars', and 'duration'.
         solution (dict): Solution dictionary containing the intersection schedules.
+        congestion (CongestionIndex, optional): Index filled with the wait time and queue length per street
+            and the wait time per intersection. Defaults to None.
 
     Returns:
         int: Score obtained by the solution.
 
     """
+    global evaluation_count
+    evaluation_count += 1
+
     bonus = input_data['bonus']
     streets = input_data['streets']
     cars = input_data['cars']
@@ -108,47 +200,8 @@ def evaluate_solution(input_data, solution):
 
     score = 0
     for car in cars:
-        current_time = 0
-        current_street_index = 0
-        car_finished = False
-        final_time = 0
-        while current_time < duration:
-            street_name = car['path'][current_street_index]
-            intersection = solution[streets[street_name]['end']
-                                    ] if streets[street_name]['end'] < len(solution) else False
-            if intersection:
-                street_exists = True if street_name in [
-                    street['street'] for street in intersection] else False
-                if not street_exists:
-                    break
-                green_street, green_duration = get_green_light(
-                    intersection, current_time)
-
-                if green_street is None:
-                    break
-
-                if green_street == street_name:
-                    current_street_index = (
-                        current_street_index + 1) % len(car['path'])
-                    street_length = streets[car['path']
-                                            [current_street_index]]['length']
-                    final_intersection = solution[streets[car['final']]['end']
-                                                  ] if streets[car['final']]['end'] < len(solution) else False
-                    current_time += street_length
-                    if final_intersection:
-                        if current_street_index == len(car['path']) - 1 and current_time < duration and car['final'] in [street['street'] for street in final_intersection]:
-                            car_finished = True
-                            final_time = current_time
-                            break
-                    else:
-                        break
-                else:
-                    current_time += green_duration
-                    continue
-            else:
-                break
-
-        if car_finished:
+        final_time = simulate_car(car, streets, solution, duration, congestion)
+        if final_time is not None:
             remaining_time = max(0, duration - final_time)
             car_score = bonus + remaining_time
             score += car_score
@@ -186,49 +239,8 @@ def evaluate_solution_delta(input_data, old_solution, new_solution, old_score, m
         if not pass_through_mutated_intersection:
             continue
 
-        current_time = 0
-        current_street_index = 0
-        car_finished = False
-        final_time = 0
-
-        while current_time < duration:
-            street_name = car['path'][current_street_index]
-            intersection = new_solution[streets[street_name]['end']] if streets[street_name]['end'] < len(
-                new_solution) else False
-            if intersection:
-                street_exists = True if street_name in [
-                    street['street'] for street in intersection] else False
-                if not street_exists:
-                    break
-                green_street, green_duration = get_green_light(
-                    intersection, current_time)
-
-                if green_street is None:
-                    break
-
-                if green_street == street_name:
-                    current_street_index = (
-                        current_street_index + 1) % len(car['path'])
-                    street_length = streets[car['path']
-                                            [current_street_index]]['length']
-                    final_intersection = new_solution[streets[car['final']]['end']] if streets[car['final']]['end'] < len(
-                        new_solution) else False
-                    current_time += street_length
-                    if final_intersection:
-                        if current_street_index == len(car['path']) - 1 and current_time < duration and car[
-                                'final'] in [street['street'] for street in final_intersection]:
-                            car_finished = True
-                            final_time = current_time
-                            break
-                    else:
-                        break
-                else:
-                    current_time += green_duration
-                    continue
-            else:
-                break
-
-        if car_finished:
+        final_time = simulate_car(car, streets, new_solution, duration)
+        if final_time is not None:
             remaining_time = max(0, duration - final_time)
             car_score = bonus + remaining_time
             score_diff += car_score
@@ -238,14 +250,16 @@ def evaluate_solution_delta(input_data, old_solution, new_solution, old_score, m
     return new_score
 
 
-def crossover(parents):
+def crossover(parents, rng=random):
     """Generate offspring from the selected parents through crossover.
 
     Args:
         parents (List): List of parent solutions.
+        rng (random.Random, optional): Random number generator. Defaults to the global random module.
 
     Returns:
-        List: List of offspring solutions.
+        List: List of offspring solutions. Streets are copied, so changing the offspring leaves the parents intact.
+            Every child keeps the street order of its first parent and takes each street's duration from either parent.
     """
     offspring = []
     offspring_size = len(parents)
@@ -257,23 +271,26 @@ def crossover(parents):
         # Uniform crossover
         solution = [[] for _ in range(len(parent1))]
         for j in range(len(parent1)):
-            for k in range(len(parent1[j])):
-                if random.uniform(0, 1) < 0.5:
-                    solution[j].append(parent1[j][k])
+            # Streets are matched by name, since inversion can put them in a different order in each parent
+            parent2_streets = {street['street']: street for street in parent2[j]}
+            for street in parent1[j]:
+                if rng.uniform(0, 1) < 0.5 or street['street'] not in parent2_streets:
+                    solution[j].append(dict(street))
                 else:
-                    solution[j].append(parent2[j][k])
+                    solution[j].append(dict(parent2_streets[street['street']]))
 
-        offspring.append(solution)
+        offspring.append(Schedule(solution))
 
     return offspring
 
 
-def select_with_replacement(input_data, population):
+def select_with_replacement(input_data, population, rng=random):
     """Select an individual from the population using fitness-proportionate selection with replacement.
 
     Args:
         input_data: Input data for evaluating the solutions.
         population: List of solutions.
+        rng: Random number generator. Defaults to the global random module.
 
     Returns:
         The selected solution.
@@ -285,44 +302,63 @@ def select_with_replacement(input_data, population):
         population_fitnesses[i] = population_fitnesses[i] + \
             population_fitnesses[i - 1]
 
-    random_number = random.randint(
+    random_number = rng.randint(
         population_fitnesses[0], population_fitnesses[-1])
     for i in range(1, len(population_fitnesses)):
         if population_fitnesses[i - 1] <= random_number and random_number <= population_fitnesses[i]:
             return population[i]
 
 
-def mutate_street_duration(solution, mutated_intersections):
+def pick_intersection(solution, rng=random, sampler=None):
+    """Pick the intersection to mutate.
+
+    Args:
+        solution (List): The solution containing intersections.
+        rng (random.Random, optional): Random number generator. Defaults to the global random module.
+        sampler (LoadSampler, optional): Sampler of intersections by congestion. Defaults to None, which picks
+            uniformly at random, as does a sampler without any congestion.
+
+    Returns:
+        int: Intersection index.
+    """
+    if sampler is not None and sampler.total > 0:
+        return sampler.sample(rng)
+    return rng.randint(0, len(solution) - 1)
+
+
+def mutate_street_duration(solution, mutated_intersections, rng=random, sampler=None):
     """Mutate the street duration within the intersections.
 
     Args:
         solution (List): The solution containing intersections.
         mutated_intersections (List): List to track mutated intersection indices.
+        rng (random.Random, optional): Random number generator. Defaults to the global random module.
+        sampler (LoadSampler, optional): Sampler picking congested intersections more often. Defaults to None.
 
     Returns:
         Tuple: The mutated solution and the updated list of mutated intersection indices.
     """
-    intersection_index = random.randint(0, len(solution) - 1)
+    intersection_index = pick_intersection(solution, rng, sampler)
     for _ in range(len(solution[intersection_index]) - 1):
-        street_index = random.randint(
+        street_index = rng.randint(
             0, len(solution[intersection_index]) - 1)
         # Avoid swapping the first street's duration with itself
         if street_index != 0:
-            solution[intersection_index][street_index]['duration'], \
-                solution[intersection_index][street_index - 1]['duration'] = \
-                solution[intersection_index][street_index - 1]['duration'], \
-                solution[intersection_index][street_index]['duration']
+            solution.swap_durations(
+                intersection_index, street_index, street_index - 1)
             if intersection_index not in mutated_intersections:
                 mutated_intersections.append(intersection_index)
     return solution, mutated_intersections
 
 
-def mutate(solution, num_mutations):
+def mutate(solution, num_mutations, rng=random, sampler=None):
     """Mutate the solution by swapping the durations of random intersections.
 
     Args:
         solution: The solution to be mutated.
         num_mutations: The number of mutations to be applied.
+        rng: Random number generator. Defaults to the global random module.
+        sampler: Sampler picking congested intersections more often. Defaults to None.
 
     Returns:
         Tuple containing the mutated solution and the list of mutated intersections.
@@ -332,15 +368,15 @@ def mutate(solution, num_mutations):
 
     for _ in range(num_mutations):
         solution, mutated_intersections = mutate_street_duration(
-            solution, mutated_intersections)
+            solution, mutated_intersections, rng, sampler)
 
         # solution, mutated_intersections = mutate_intersection_duration(
-        #     solution, mutated_intersections)
+        #     solution, mutated_intersections, rng, sampler)
 
     return solution, mutated_intersections
 
 
-def inversion(solution):
+def inversion(solution, rng=random):
     """Apply inversion operator to the solution.
 
     The inversion operator randomly selects a range of streets within each intersection
@@ -348,67 +384,179 @@ def inversion(solution):
 
     Args:
         solution (List): The solution to apply the inversion operator to.
+        rng (random.Random, optional): Random number generator. Defaults to the global random module.
 
     Returns:
         List: The solution after applying the inversion operation.
     """
     for i in range(len(solution)):
         if len(solution[i]) > 1:
-            start = random.randint(0, len(solution[i]) - 2)
-            end = random.randint(start + 1, len(solution[i]) - 1)
+            start = rng.randint(0, len(solution[i]) - 2)
+            end = rng.randint(start + 1, len(solution[i]) - 1)
             solution[i][start:end + 1] = reversed(solution[i][start:end + 1])
     return solution
 
 
-def tournament_selection(input_data, population, tournament_size):
+def tournament_selection(input_data, population, tournament_size, rng=random):
     """Perform tournament selection on a population to select two individuals as winners.
 
     Args:
         input_data (dict): Input data for evaluation
         population (List): List of individuals in the population
         tournament_size (int): Size of each tournament
+        rng (random.Random, optional): Random number generator. Defaults to the global random module.
 
     Returns:
         List: List containing two selected individuals as winners
     """
     selected = []
     for _ in range(2):
-        tournament = random.sample(population, tournament_size)
+        tournament = rng.sample(population, tournament_size)
         winner = max(tournament, key=lambda individual: evaluate_solution(
             input_data, individual))
         selected.append(winner)
     return selected
 
 
-def genetic_algorithm(input_data, parameters):
+def screen_offspring(input_data, candidates, model, fraction, street_demand, total_demand, parent_scores):
+    """Decide which offspring replace their parents, simulating only the offspring the surrogate model ranks best.
+
+    The model predicts how much the score of every child changes from its parent, which is what decides
+    whether it replaces the parent. Offspring that are not simulated are rejected. Every simulation is used
+    to train the model further. Until the model has seen enough simulations all offspring are simulated.
+
+    Args:
+        input_data (dict): Input data.
+        candidates (List): List of (parent, child) tuples.
+        model (SurrogateModel): Surrogate model of the score change.
+        fraction (float): Fraction of the offspring to simulate.
+        street_demand (dict): Number of cars waiting at the end of each street.
+        total_demand (int): Sum of the street demands.
+        parent_scores (dict): Score per id of the parents, completed here for parents that are missing.
+
+    Returns:
+        tuple: The selected solutions, the absolute error of the predictions on the simulated offspring
+            relative to their total score, the share of simulated offspring pairs the model ranked in the right
+            order (both None if the model was not used) and the number of simulations saved.
+    """
+    duration = input_data['duration']
+    max_score = len(input_data['cars']) * (input_data['bonus'] + duration)
+    for parent, _ in candidates:
+        if id(parent) not in parent_scores:
+            parent_scores[id(parent)] = evaluate_solution(input_data, parent)
+    features = [get_features(child, parent_scores[id(parent)], max_score, street_demand, total_demand, duration)
+                for parent, child in candidates]
+
+    if model.is_ready():
+        predictions = [model.predict(child_features)
+                       for child_features in features]
+        ranking = sorted(range(len(candidates)),
+                         key=lambda i: predictions[i], reverse=True)
+        simulated = set(
+            ranking[:max(1, math.ceil(fraction * len(candidates)))])
+    else:
+        predictions = None
+        simulated = set(range(len(candidates)))
+
+    selected = []
+    absolute_error = 0
+    simulated_score = 0
+    predicted_changes = []
+    score_changes = []
+    for i, (parent, child) in enumerate(candidates):
+        if i not in simulated:
+            selected.append(parent)
+            continue
+
+        score = evaluate_solution(input_data, child)
+        score_change = score - parent_scores[id(parent)]
+        if predictions is not None:
+            absolute_error += abs(predictions[i] - score_change)
+            predicted_changes.append(predictions[i])
+            score_changes.append(score_change)
+        simulated_score += score
+        model.add(features[i], score_change)
+
+        if score_change > 0:
+            selected.append(child)
+        else:
+            selected.append(parent)
+
+    if predictions is None:
+        return selected, None, None, 0
+    return (selected, absolute_error / max(simulated_score, 1),
+            get_ranking_accuracy(predicted_changes, score_changes), len(candidates) - len(simulated))
+
+
+def genetic_algorithm(input_data, parameters, time_limit=DEFAULT_TIME_LIMIT, rng=random, short_cycles=False,
+                      progress=None, control=None, checkpoint=None, surrogate_fraction=None,
+                      on_improvement=None, initial_solutions=None, targeted_mutation=False, generations=None):
     """Runs the genetic algorithm to find a solution to the traffic signaling problem.
 
     Args:
         input_data (dict): Input data.
         parameters (tuple): Genetic algorithm parameters.
+        time_limit (float, optional): Time budget of the run in seconds. Defaults to 3 minutes.
+        rng (random.Random, optional): Random number generator. Defaults to the global random module.
+        short_cycles (bool, optional): Bias the initial cycle times towards short, demand-proportional ones. Defaults to False.
+        progress (ProgressReporter, optional): Reporter refreshed while the offspring of every generation are
+            created. Defaults to None.
+        control (RunControl, optional): Signal state checked after every generation to stop early or
+            dump the best solution so far. Defaults to None.
+        checkpoint (callable, optional): Called with the best solution so far when a dump is requested. Defaults to None.
+        surrogate_fraction (float, optional): Fraction of the offspring that a surrogate model lets through to
+            full simulation. Defaults to None, which simulates all offspring.
+        on_improvement (callable, optional): Called with the best solution and its score whenever a generation
+            improves on the best score so far, and once for the initial solution. Defaults to None.
+        initial_solutions (list, optional): Solutions of earlier runs placed in the initial population, the rest
+            of the population is initialized randomly. Defaults to None.
+        targeted_mutation (bool, optional): Let mutation pick intersections in proportion to the car wait time
+            at them when simulating the best solution. Defaults to False.
+        generations (int, optional): Number of generations to run instead of running until the time limit, so
+            that runs with the same random number generator seed end with the same solution. Defaults to None.
 
     Returns:
         list: Intersection/solution data.
     """
     start_time = time.time()
+    start_evaluation_count = evaluation_count
     population_size, num_mutations, mutation_rate, inversion_rate, tournament = parameters
 
     streets = input_data['streets']
     number_of_intersections = input_data['number_of_intersections']
 
-    population = []
-    for i in range(population_size):
+    demand = get_intersection_demand(
+        streets, input_data['cars'], number_of_intersections) if short_cycles else None
+
+    population = list(initial_solutions or [])[:population_size]
+    for i in range(population_size - len(population)):
         solution = init_solution(
-            streets, number_of_intersections, input_data['duration'])
+            streets, number_of_intersections, input_data['duration'], rng, demand)
         population.append(solution)
+    print('Initialization Time: {:.3f}s'.format(time.time() - start_time))
 
     best_solution = population[0]
-    print('Initial Solution: ', evaluate_solution(input_data, best_solution))
+    reported_score = evaluate_solution(input_data, best_solution)
+    print('Initial Solution: ', reported_score)
+    if on_improvement is not None:
+        on_improvement(best_solution, reported_score)
+
+    sampler = LoadSampler(number_of_intersections) if targeted_mutation else None
+
+    surrogate = None
+    if surrogate_fraction:
+        street_demand = get_street_demand(input_data['cars'])
+        total_demand = sum(street_demand.values())
+        surrogate = SurrogateModel(len(get_features(
+            best_solution, reported_score, 1, street_demand, total_demand, input_data['duration'])))
+        # Scores of the population, known from the end of the previous generation
+        population_scores = {}
 
     generation = 0
     fitness_scores = []
+    best_score = reported_score
 
-    while time.time() - start_time < 3*60:
+    while (generation < generations) if generations is not None else (time.time() - start_time < time_limit):
         for solution in population:
             if evaluate_solution(input_data, solution) > evaluate_solution(input_data, best_solution):
                 best_solution = solution
@@ -416,29 +564,48 @@ def genetic_algorithm(input_data, parameters):
         best_solution = copy.deepcopy(best_solution)
         new_population = []
 
+        if sampler is not None:
+            # Target the intersections where the cars of the best solution wait the longest
+            congestion = CongestionIndex()
+            evaluate_solution(input_data, best_solution, congestion)
+            sampler.set_loads(congestion.intersection_wait_time)
+        # Offspring waiting to be screened by the surrogate model
+        candidates = []
+
         for _ in range(int(population_size)):
+            if progress is not None:
+                progress.update(generation, evaluation_count -
+                                start_evaluation_count, best_score)
 
             if tournament:
-                tournament_size = random.randint(1, population_size - 1)
+                tournament_size = rng.randint(1, population_size - 1)
                 parentA, parentB = tournament_selection(
-                    input_data, population, tournament_size)
+                    input_data, population, tournament_size, rng)
             else:
-                parentA = select_with_replacement(input_data, population)
-                parentB = select_with_replacement(input_data, population)
+                parentA = select_with_replacement(input_data, population, rng)
+                parentB = select_with_replacement(input_data, population, rng)
 
-            childA, childB = crossover([parentA, parentB])
+            childA, childB = crossover([parentA, parentB], rng)
 
-            childA_old_score = evaluate_solution(input_data, childA)
-            childB_old_score = evaluate_solution(input_data, childB)
+            if surrogate is None:
+                childA_old_score = evaluate_solution(input_data, childA)
+                childB_old_score = evaluate_solution(input_data, childB)
             mutated_intersectionA = None
             mutated_intersectionB = None
 
-            if random.randint(0, 1) < mutation_rate:
-                childA, mutated_intersectionA = mutate(childA, num_mutations)
-                childB, mutated_intersectionB = mutate(childB, num_mutations)
-            if random.randint(0, 1) < inversion_rate:
-                childA = inversion(childA)
-                childB = inversion(childB)
+            if rng.randint(0, 1) < mutation_rate:
+                childA, mutated_intersectionA = mutate(
+                    childA, num_mutations, rng, sampler)
+                childB, mutated_intersectionB = mutate(
+                    childB, num_mutations, rng, sampler)
+            if rng.randint(0, 1) < inversion_rate:
+                childA = inversion(childA, rng)
+                childB = inversion(childB, rng)
+
+            if surrogate is not None:
+                candidates.append((parentA, childA))
+                candidates.append((parentB, childB))
+                continue
 
             childA_new_score = evaluate_solution_delta(
                 input_data, parentA, childA, childA_old_score, mutated_intersectionA)
@@ -456,6 +623,14 @@ def genetic_algorithm(input_data, parameters):
             else:
                 new_population.append(parentB)
 
+        if surrogate is not None:
+            selected, error, accuracy, saved = screen_offspring(
+                input_data, candidates, surrogate, surrogate_fraction, street_demand, total_demand, population_scores)
+            new_population.extend(selected)
+            print('Generation {}: surrogate error {}, ranking accuracy {}, {} of {} simulations saved'.format(
+                generation + 1, 'n/a' if error is None else '{:.1%}'.format(error),
+                'n/a' if accuracy is None else '{:.1%}'.format(accuracy), saved, len(candidates)))
+
         # Store the fitness scores of this generation
         fitness_scores.append([])
         for i in range(len(new_population)):
@@ -465,27 +640,54 @@ def genetic_algorithm(input_data, parameters):
 
         population = [x[0]
                       for x in fitness_scores[generation][:population_size]]
+        if surrogate is not None:
+            population_scores = {id(solution): score for solution,
+                                 score in fitness_scores[generation][:population_size]}
 
         best_fitness_score = fitness_scores[generation][0][1]
 
         # print('Generation {}: Fitness score of the best solution = {}'.format(
         #     generation + 1, best_fitness_score))
 
-        if evaluate_solution(input_data, best_solution) < fitness_scores[generation][0][1]:
+        best_score = evaluate_solution(input_data, best_solution)
+        if best_score < fitness_scores[generation][0][1]:
             best_solution = fitness_scores[generation][0][0]
+            best_score = fitness_scores[generation][0][1]
 
         generation += 1
 
+        if progress is not None:
+            progress.update(generation, evaluation_count -
+                            start_evaluation_count, best_score)
+
+        if on_improvement is not None and best_score > reported_score:
+            reported_score = best_score
+            on_improvement(best_solution, best_score)
+
+        if control is not None:
+            if control.dump_requested and checkpoint is not None:
+                control.dump_requested = False
+                checkpoint(best_solution)
+            if control.stop_requested:
+                break
+
+    if progress is not None:
+        progress.finish()
+    if control is not None and control.stop_requested:
+        print('Stopped after generation {}.'.format(generation))
+
     print('Best Solution: ', evaluate_solution(input_data, best_solution))
     return best_solution
 
 
-def mutate_intersection_duration(solution, mutated_intersections):
+def mutate_intersection_duration(solution, mutated_intersections, rng=random, sampler=None):
     """Mutate the intersection duration within the solution.
 
     Args:
         solution (List): The solution containing intersections.
         mutated_intersections (List): List to track mutated intersection indices.
+        rng (random.Random, optional): Random number generator. Defaults to the global random module.
+        sampler (LoadSampler, optional): Sampler picking congested intersections more often. Defaults to None.
 
     Returns:
         Tuple: The mutated solution and the updated list of mutated intersection indices.
@@ -494,35 +696,33 @@ def mutate_intersection_duration(solution, mutated_intersections):
     if num_intersections < 2:
         return solution, mutated_intersections
 
-    index1 = random.randint(0, num_intersections - 1)
-    index2 = random.randint(0, num_intersections - 1)
+    index1 = pick_intersection(solution, rng, sampler)
+    index2 = pick_intersection(solution, rng, sampler)
     while index1 == index2:
         # Make sure the two indices are different
-        index2 = random.randint(0, num_intersections - 1)
+        index2 = rng.randint(0, num_intersections - 1)
 
     # Swap the durations of the two intersections
-    intersection1 = solution[index1]
-    intersection2 = solution[index2]
-    duration1 = sum(street['duration'] for street in intersection1)
-    duration2 = sum(street['duration'] for street in intersection2)
+    duration1 = solution.cycle_times[index1]
+    duration2 = solution.cycle_times[index2]
 
     # Update the durations of the streets in each intersection
     remaining_time1 = duration2
     remaining_time2 = duration1
 
-    for street in intersection1:
-        duration = round((duration2 / len(intersection1)))
-        street['duration'] = duration
+    for street_index in range(len(solution[index1])):
+        duration = round((duration2 / len(solution[index1])))
+        solution.set_duration(index1, street_index, duration)
         remaining_time1 -= duration
 
-    for street in intersection2:
-        duration = round((duration1 / len(intersection2)))
-        street['duration'] = duration
+    for street_index in range(len(solution[index2])):
+        duration = round((duration1 / len(solution[index2])))
+        solution.set_duration(index2, street_index, duration)
         remaining_time2 -= duration
 
     # Distribute remaining time among the streets
-    distribute_remaining_time(intersection1, remaining_time1)
-    distribute_remaining_time(intersection2, remaining_time2)
+    distribute_remaining_time(solution, index1, remaining_time1)
+    distribute_remaining_time(solution, index2, remaining_time2)
 
     if index1 not in mutated_intersections:
         mutated_intersections.append(index1)
@@ -533,16 +733,23 @@ def mutate_intersection_duration(solution, mutated_intersections):
     return solution, mutated_intersections
 
 
-def distribute_remaining_time(intersection, remaining_time):
+def distribute_remaining_time(solution, intersection_index, remaining_time):
     """Distribute remaining time among the streets in the intersection.
 
+    Every street gets an equal share, the seconds left over go one each to the streets with the shortest durations.
+
     Args:
-        intersection (List): Intersection data.
+        solution (Schedule): The solution containing intersections.
+        intersection_index (int): Intersection index.
         remaining_time (int): Remaining time to distribute.
     """
     if remaining_time > 0:
-        streets = sorted(intersection, key=lambda street: street['duration'])
-        num_streets = len(streets)
-        for i in range(remaining_time):
-            street_index = i % num_streets
-            streets[street_index]['duration'] += 1
+        intersection = solution[intersection_index]
+        street_indices = sorted(range(len(intersection)),
+                                key=lambda street_index: intersection[street_index]['duration'])
+        share, extra = divmod(remaining_time, len(street_indices))
+        for rank, street_index in enumerate(street_indices):
+            added_time = share + 1 if rank < extra else share
+            if added_time:
+                solution.set_duration(intersection_index, street_index,
+                                      intersection[street_index]['duration'] + added_time)
@@ -0,0 +1,133 @@
+from algorithm import evaluate_solution, genetic_algorithm
+from file_management import read_file, write_file
+from helper import get_instance_name, get_output_filename, get_rng
+
+import glob
+import multiprocessing
+import os
+import time
+
+
+def get_input_files(inputs):
+    """Get the input files of a batch from a directory or a glob pattern.
+
+    Args:
+        inputs (str): Directory containing '.in.txt' files or a glob pattern.
+
+    Returns:
+        list: Sorted list of input file names.
+    """
+    if os.path.isdir(inputs):
+        inputs = os.path.join(inputs, '*.in.txt')
+    return sorted(glob.glob(inputs))
+
+
+def split_time_budget(input_files, time_budget, workers):
+    """Split the total time budget among the input files in proportion to their size.
+
+    A file runs on a single worker, so no file gets more than the wall-clock budget time_budget / workers.
+    What a large file would get above that is split among the other files in proportion to their size.
+
+    Args:
+        input_files (list): List of input file names.
+        time_budget (float): Total time budget in seconds.
+        workers (int): Number of worker processes.
+
+    Returns:
+        dict: Time budget in seconds per input file.
+    """
+    sizes = {input_file: os.path.getsize(input_file)
+             for input_file in input_files}
+    max_time_limit = time_budget / workers
+
+    time_limits = {}
+    while sizes:
+        total_size = sum(sizes.values())
+        shares = {input_file: time_budget * (size / total_size if total_size else 1 / len(sizes))
+                  for input_file, size in sizes.items()}
+        capped = [input_file for input_file,
+                  share in shares.items() if share > max_time_limit]
+        if not capped:
+            time_limits.update(shares)
+            break
+        for input_file in capped:
+            time_limits[input_file] = max_time_limit
+            time_budget -= max_time_limit
+            del sizes[input_file]
+    return time_limits
+
+
+def run_instance(job):
+    """Run the genetic algorithm on a single input file and write its solution.
+
+    Args:
+        job (tuple): Input file name, genetic algorithm parameters, time limit in seconds, seed, stream index and
+            keyword options of the genetic algorithm.
+
+    Returns:
+        tuple: Input file name, time spent in seconds and score of the written solution.
+    """
+    input_file, parameters, time_limit, seed, stream, options = job
+    start_time = time.time()
+    input_data = read_file(input_file)
+    result = genetic_algorithm(
+        input_data, parameters, time_limit, get_rng(seed, stream), **options)
+    write_file(result, get_output_filename(input_file))
+    return input_file, time.time() - start_time, evaluate_solution(input_data, result)
+
+
+def batch(inputs, parameters, time_budget, workers, seed=None, options=None):
+    """Run the genetic algorithm on several input files sharing one pool of workers.
+
+    The time budget is the total CPU time spent on all input files. Every input file gets a share
+    of it proportional to its size, but at most time_budget / workers seconds, so the batch takes
+    roughly time_budget / workers seconds. With fewer input files than workers it ends earlier.
+
+    Args:
+        inputs (str): Directory containing '.in.txt' files or a glob pattern.
+        parameters (tuple): Genetic algorithm parameters.
+        time_budget (float): Total time budget in seconds, ignored when options sets a number of generations.
+        workers (int): Number of worker processes.
+        seed (int, optional): Seed for reproducible runs. Every input file gets its own random stream. Together with
+            the generations option the scores do not depend on the number of workers. Defaults to None.
+        options (dict, optional): Keyword options passed on to the genetic algorithm, e.g. short_cycles. Defaults to None.
+
+    Returns:
+        dict: Score per input file.
+    """
+    input_files = get_input_files(inputs)
+    if not input_files:
+        print(f'No input files found for {inputs}.')
+        return {}
+
+    options = options or {}
+    workers = min(workers, len(input_files))
+    time_limits = split_time_budget(input_files, time_budget, workers)
+    # Start the largest instances first so they do not end up running alone at the end
+    jobs = sorted(((input_file, parameters, time_limits[input_file], seed, stream, options) for stream, input_file in enumerate(input_files)),
+                  key=lambda job: job[2], reverse=True)
+
+    results = {}
+    with multiprocessing.Pool(workers) as pool:
+        for input_file, time_spent, score in pool.imap_unordered(run_instance, jobs):
+            results[input_file] = (time_spent, score)
+
+    print_summary(results)
+
+    return {input_file: score for input_file, (_, score) in results.items()}
+
+
+def print_summary(results):
+    """Print the per-file and total scores of a batch.
+
+    Args:
+        results (dict): Time spent and score per input file.
+    """
+    print('{:<24} {:>10} {:>14}'.format('Instance', 'Time (s)', 'Score'))
+    for input_file in sorted(results):
+        time_spent, score = results[input_file]
+        print('{:<24} {:>10.1f} {:>14}'.format(
+            get_instance_name(input_file), time_spent, score))
+    print('{:<24} {:>10.1f} {:>14}'.format(
+        'Total', sum(time_spent for time_spent, _ in results.values()),
+        sum(score for _, score in results.values())))
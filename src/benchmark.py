@@ -0,0 +1,179 @@
+from algorithm import evaluate_solution, init_solution
+from file_management import read_file
+from generator import generate_instance
+from helper import get_rng
+
+import csv
+import math
+import os
+import time
+import tracemalloc
+
+# Growth exponents above this between two sizes are reported as super-linear
+SUPER_LINEAR_EXPONENT = 1.5
+
+
+def run_steps(input_file, rng):
+    """Parse an input file, initialize a solution and evaluate it, timing every step.
+
+    Args:
+        input_file (str): Input file name.
+        rng (random.Random): Random number generator.
+
+    Returns:
+        dict: Parse, initialization and evaluation time in seconds.
+    """
+    start_time = time.perf_counter()
+    input_data = read_file(input_file)
+    parse_time = time.perf_counter() - start_time
+
+    start_time = time.perf_counter()
+    solution = init_solution(input_data['streets'], input_data['number_of_intersections'],
+                             input_data['duration'], rng)
+    init_time = time.perf_counter() - start_time
+
+    start_time = time.perf_counter()
+    evaluate_solution(input_data, solution)
+    evaluation_time = time.perf_counter() - start_time
+
+    return {
+        'parse_time': parse_time,
+        'init_time': init_time,
+        'evaluation_time': evaluation_time
+    }
+
+
+def measure_instance(input_file, rng):
+    """Measure parse, initialization and evaluation time and peak memory on one input file.
+
+    Tracing allocations slows the steps down by different factors, so the steps are timed untraced first
+    and then run again with the same random numbers to measure the peak memory.
+
+    Args:
+        input_file (str): Input file name.
+        rng (random.Random): Random number generator.
+
+    Returns:
+        dict: Timings in seconds and peak memory in MB.
+    """
+    state = rng.getstate()
+    measurements = run_steps(input_file, rng)
+
+    rng.setstate(state)
+    tracemalloc.start()
+    run_steps(input_file, rng)
+    _, peak_memory = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    measurements['peak_memory'] = peak_memory / 2**20
+    return measurements
+
+
+def get_growth_exponents(sizes, values):
+    """Get the exponent k of values ~ size^k between every two consecutive sizes.
+
+    Args:
+        sizes (list): Instance sizes.
+        values (list): Measured values.
+
+    Returns:
+        list: Growth exponent per size, None for the first size or when a value is 0.
+    """
+    exponents = [None]
+    for i in range(1, len(sizes)):
+        if values[i - 1] > 0 and values[i] > 0 and sizes[i] != sizes[i - 1]:
+            exponents.append(math.log(
+                values[i] / values[i - 1]) / math.log(sizes[i] / sizes[i - 1]))
+        else:
+            exponents.append(None)
+    return exponents
+
+
+def plot_results(rows, fname):
+    """Plot the measurements against the instance size if matplotlib is installed.
+
+    Args:
+        rows (list): Measurements per instance size.
+        fname (str): Image file name.
+    """
+    try:
+        import matplotlib
+        matplotlib.use('Agg')
+        import matplotlib.pyplot as plt
+    except ImportError:
+        print('matplotlib is not installed, skipping the plot.')
+        return
+
+    sizes = [row['intersections'] for row in rows]
+    figure, (time_axis, memory_axis) = plt.subplots(1, 2, figsize=(12, 5))
+    for key, label in (('parse_time', 'Parse'), ('init_time', 'Initialization'), ('evaluation_time', 'Evaluation')):
+        time_axis.loglog(sizes, [row[key] for row in rows], marker='o', label=label)
+    time_axis.set_xlabel('Intersections')
+    time_axis.set_ylabel('Time (s)')
+    time_axis.legend()
+    memory_axis.loglog(sizes, [row['peak_memory'] for row in rows], marker='o')
+    memory_axis.set_xlabel('Intersections')
+    memory_axis.set_ylabel('Peak memory (MB)')
+    figure.tight_layout()
+    figure.savefig(fname)
+    print(f'Plot written to {fname}')
+
+
+def benchmark(sizes, streets_per_intersection=2, cars_per_intersection=1, duration=1000, seed=None,
+              instance_dir='../data/generated', result_file='../data/results/scaling.csv'):
+    """Run the scaling benchmark on synthetic instances of growing size.
+
+    For every size an instance with that many intersections is generated, parsed, initialized and
+    evaluated, once for the timings and once more for the peak memory. The measurements are printed,
+    written to a CSV file and plotted. Steps that grow faster than size^1.5 between two sizes are flagged.
+
+    Args:
+        sizes (list): Numbers of intersections.
+        streets_per_intersection (int, optional): Streets per intersection. Defaults to 2.
+        cars_per_intersection (float, optional): Cars per intersection. Defaults to 1.
+        duration (int, optional): Duration of simulation. Defaults to 1000.
+        seed (int, optional): Seed for reproducible instances. Defaults to None.
+        instance_dir (str, optional): Directory the instances are written to. Defaults to '../data/generated'.
+        result_file (str, optional): Results CSV file. Defaults to '../data/results/scaling.csv'.
+
+    Returns:
+        list: Measurements per instance size.
+    """
+    rows = []
+    for stream, size in enumerate(sorted(sizes)):
+        rng = get_rng(seed, stream)
+        input_file = os.path.join(instance_dir, f'scaling_{size}.in.txt')
+        number_of_streets = min(streets_per_intersection *
+                                size, size * (size - 1))
+        number_of_cars = max(1, round(cars_per_intersection * size))
+        generate_instance(input_file, size, number_of_streets,
+                          number_of_cars, duration, rng=rng)
+
+        row = {'intersections': size, 'streets': number_of_streets,
+               'cars': number_of_cars}
+        row.update(measure_instance(input_file, rng))
+        rows.append(row)
+
+    sizes = [row['intersections'] for row in rows]
+    print('{:>13} {:>8} {:>8} {:>10} {:>10} {:>10} {:>11}'.format(
+        'Intersections', 'Streets', 'Cars', 'Parse (s)', 'Init (s)', 'Eval (s)', 'Memory (MB)'))
+    for row in rows:
+        print('{:>13} {:>8} {:>8} {:>10.3f} {:>10.3f} {:>10.3f} {:>11.1f}'.format(
+            row['intersections'], row['streets'], row['cars'], row['parse_time'], row['init_time'],
+            row['evaluation_time'], row['peak_memory']))
+
+    for key, label in (('parse_time', 'Parse'), ('init_time', 'Initialization'),
+                       ('evaluation_time', 'Evaluation'), ('peak_memory', 'Memory')):
+        for size, exponent in zip(sizes, get_growth_exponents(sizes, [row[key] for row in rows])):
+            if exponent is not None and exponent > SUPER_LINEAR_EXPONENT:
+                print(f'{label} grows super-linearly up to {size} intersections: ~size^{exponent:.2f}')
+
+    os.makedirs(os.path.dirname(result_file) or '.', exist_ok=True)
+    with open(result_file, 'w', newline='') as results:
+        csv_writer = csv.DictWriter(results, fieldnames=list(rows[0]))
+        csv_writer.writeheader()
+        csv_writer.writerows(rows)
+
+    plot_results(rows, os.path.splitext(result_file)[0] + '.png')
+
+    return rows
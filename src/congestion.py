@@ -0,0 +1,99 @@
+class CongestionIndex:
+    """Congestion recorded while simulating a solution: how long and how often cars wait at red lights."""
+
+    def __init__(self):
+        self.street_wait_time = {}
+        self.street_queue = {}
+        self.intersection_wait_time = {}
+        self.max_wait_time = 0
+
+    def record_wait(self, street_name, intersection_index, wait_time):
+        """Record a car stopping at the end of a street until its light turns green.
+
+        Args:
+            street_name (str): Street the car waits on.
+            intersection_index (int): Intersection at the end of the street.
+            wait_time (int): Time the car waits in seconds.
+        """
+        self.street_wait_time[street_name] = self.street_wait_time.get(
+            street_name, 0) + wait_time
+        self.street_queue[street_name] = self.street_queue.get(
+            street_name, 0) + 1
+        self.intersection_wait_time[intersection_index] = self.intersection_wait_time.get(
+            intersection_index, 0) + wait_time
+        self.max_wait_time = max(self.max_wait_time, wait_time)
+
+
+class LoadSampler:
+    """Sample intersection indices in proportion to integer loads, e.g. total car wait times.
+
+    The loads are kept in a Fenwick tree, so changing a load and drawing a sample both take O(log n).
+    """
+
+    def __init__(self, size):
+        """Create a sampler where all loads are 0.
+
+        Args:
+            size (int): Number of intersections.
+        """
+        self.size = size
+        self.tree = [0] * (size + 1)
+        self.loads = [0] * size
+        self.loaded = set()
+        self.total = 0
+
+    def update(self, index, load):
+        """Change the load of an intersection.
+
+        Args:
+            index (int): Intersection index.
+            load (int): New load.
+        """
+        delta = load - self.loads[index]
+        if not delta:
+            return
+        self.loads[index] = load
+        self.total += delta
+        if load:
+            self.loaded.add(index)
+        else:
+            self.loaded.discard(index)
+
+        i = index + 1
+        while i <= self.size:
+            self.tree[i] += delta
+            i += i & -i
+
+    def set_loads(self, loads):
+        """Replace all loads, touching only the intersections that are or were loaded.
+
+        Args:
+            loads (dict): Load per intersection index, missing intersections have load 0.
+        """
+        for index in self.loaded - loads.keys():
+            self.update(index, 0)
+        for index, load in loads.items():
+            self.update(index, load)
+
+    def sample(self, rng):
+        """Draw an intersection index with probability proportional to its load.
+
+        Args:
+            rng (random.Random): Random number generator.
+
+        Returns:
+            int: Intersection index, None if all loads are 0.
+        """
+        if self.total <= 0:
+            return None
+
+        target = rng.randrange(self.total)
+        position = 0
+        step = 1 << (self.size.bit_length() - 1)
+        while step:
+            next_position = position + step
+            if next_position <= self.size and self.tree[next_position] <= target:
+                position = next_position
+                target -= self.tree[next_position]
+            step >>= 1
+        return position
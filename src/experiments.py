@@ -1,11 +1,31 @@
 from algorithm import evaluate_solution, genetic_algorithm
 from file_management import read_file, write_file
+from helper import get_instance_name, get_profile_prefix, get_rng
+from profiling import profile_call
 
 import csv
 import os
 
 
-def experiment(configuration_file):
+def run_experiment(input_file, parameters, rng, generations=None):
+    """Read an input file and run the genetic algorithm on it.
+
+    Args:
+        input_file (str): Input file name.
+        parameters (tuple): Genetic algorithm parameters.
+        rng (random.Random): Random number generator.
+        generations (int, optional): Number of generations to run instead of running until the time limit. Defaults to None.
+
+    Returns:
+        tuple: Input data and the best solution found.
+    """
+    input_data = read_file(input_file)
+    result = genetic_algorithm(
+        input_data, parameters, rng=rng, generations=generations)
+    return input_data, result
+
+
+def experiment(configuration_file, seed=None, profile=False, profile_top=20, generations=None):
     """
     Function to execute a series of genetic algorithm experiments based on a configuration CSV file. 
 
@@ -25,7 +45,12 @@ def experiment(configuration_file):
     from the config CSV file, with the 'file_name' column replaced by the 'output_file' column, and a new 'score' column added.
 
     Args:
-        None
+        configuration_file (str): Path to the configuration CSV file.
+        seed (int, optional): Seed for reproducible runs. Every row gets its own random stream. Defaults to None.
+        profile (bool, optional): Profile every experiment, writing its profile files next to the output folder. Defaults to False.
+        profile_top (int, optional): Number of functions to print when profiling. Defaults to 20.
+        generations (int, optional): Number of generations every experiment runs instead of running until the
+            time limit. Defaults to None.
 
     Returns:
         None
@@ -42,7 +67,7 @@ def experiment(configuration_file):
         csv_rows.append(headers + ['score'])
         instance_counter = 1
 
-        for row in csv_reader:
+        for row_index, row in enumerate(csv_reader):
             print('Currently in session Instance ', instance_counter)
             input_file = row[0]
             parameters = (int(row[1]), int(row[2]), float(
@@ -52,9 +77,6 @@ def experiment(configuration_file):
                 print(f"Input file {input_file} does not exist. Skipping...")
                 continue
 
-            input_data = read_file(input_file)
-            result = genetic_algorithm(input_data, parameters)
-
             # Count how many outputs for this input file
             if input_file in output_counter:
                 output_counter[input_file] += 1
@@ -70,6 +92,14 @@ def experiment(configuration_file):
 
             output_filename = os.path.join(output_dirname, output_basename)
 
+            if profile:
+                input_data, result = profile_call(get_instance_name(output_filename), get_profile_prefix(output_filename),
+                                                  run_experiment, input_file, parameters, get_rng(seed, row_index),
+                                                  generations, top=profile_top)
+            else:
+                input_data, result = run_experiment(
+                    input_file, parameters, get_rng(seed, row_index), generations)
+
             write_file(result, output_filename)
 
             # Save score for each output file
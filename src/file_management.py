@@ -1,4 +1,8 @@
-from representation import get_cars, get_streets
+from helper import get_instance_name
+from representation import Schedule, get_cars, get_streets, repair_solution, split_reachable_cars
+
+import csv
+import os
 
 
 def read_file(fname="../data/input/fiek.in.txt"):
@@ -13,21 +17,41 @@ def read_file(fname="../data/input/fiek.in.txt"):
     with open(fname, "r+") as example_file:
         content = example_file.read().splitlines()
 
-        duration, number_of_intersections, number_of_streets, number_of_cars, bonus = map(
-            int, content[0].split())
+    return parse_input(content, get_instance_name(fname))
+
 
-        streets = get_streets(content, number_of_streets)
-        cars = get_cars(content, streets, number_of_streets, number_of_cars)
+def parse_input(content, instance_name):
+    """Parse the lines of an input file
+
+    Args:
+        content (list): Lines of the input file
+        instance_name (str): Instance name used when reporting on the input
 
-        input_data = {
-            'duration': duration,
-            'number_of_intersections': number_of_intersections,
-            'number_of_streets': number_of_streets,
-            'number_of_cars': number_of_cars,
-            'bonus': bonus,
-            'streets': streets,
-            'cars': cars
-        }
+    Returns:
+        Dict: Input data representation
+    """
+    duration, number_of_intersections, number_of_streets, number_of_cars, bonus = map(
+        int, content[0].split())
+
+    streets = get_streets(content, number_of_streets)
+    cars = get_cars(content, streets, number_of_streets, number_of_cars)
+    # Cars that can never finish do not contribute to the score, leave them out of the evaluation
+    cars, unreachable_cars = split_reachable_cars(cars, duration)
+
+    input_data = {
+        'duration': duration,
+        'number_of_intersections': number_of_intersections,
+        'number_of_streets': number_of_streets,
+        'number_of_cars': number_of_cars,
+        'bonus': bonus,
+        'streets': streets,
+        'cars': cars,
+        'number_of_unreachable_cars': len(unreachable_cars)
+    }
+
+    if number_of_cars:
+        print('{}% of cars in {} are unreachable'.format(
+            round(100 * len(unreachable_cars) / number_of_cars), instance_name))
 
     return input_data
 
@@ -40,26 +64,29 @@ def write_file(intersections, fname='../data/output/fiek.out.txt'):
         fname (str, optional): Output filename. Defaults to '../data/fiek.out.txt'.
     """
     with open(fname, 'w') as submission_file:
-        intersections_done = 0
-        for i in range(len(intersections)):
-            sum_duration_per_intersection = sum(
-                value['duration'] for value in intersections[i])
-            if sum_duration_per_intersection > 0:
-                intersections_done += 1
-
-        submission_file.write(f'{intersections_done}\n')
-
-        for i in range(len(intersections)):
-            sum_duration = sum(value['duration'] for value in intersections[i])
-            if sum_duration > 0:
-                submission_file.write(f'{i}\n')
-                sum_streets = sum(value['duration'] >
-                                  0 for value in intersections[i])
-                submission_file.write(f'{sum_streets}\n')
-                for value in intersections[i]:
-                    if value['duration'] > 0:
-                        submission_file.write(
-                            f"{value['street']} {value['duration']}\n")
+        write_solution(intersections, submission_file)
+
+
+def write_solution(intersections, submission_file):
+    """Write solution to an open file object.
+
+    Args:
+        intersections (list): Solution list of intersections
+        submission_file (file): Text file object to write the submission to
+    """
+    if not isinstance(intersections, Schedule):
+        intersections = Schedule(intersections)
+
+    submission_file.write(f'{intersections.scheduled_intersections}\n')
+
+    for i in range(len(intersections)):
+        if intersections.cycle_times[i] > 0:
+            submission_file.write(f'{i}\n')
+            submission_file.write(f'{intersections.green_streets[i]}\n')
+            for value in intersections[i]:
+                if value['duration'] > 0:
+                    submission_file.write(
+                        f"{value['street']} {value['duration']}\n")
 
 
 def parse_submission_file(filename):
@@ -70,7 +97,7 @@ def parse_submission_file(filename):
     filename (str): The path to the submission file.
 
     Returns:
-    list: A list where each index represents an intersection ID and each element is a list of dictionaries
+    Schedule: A list where each index represents an intersection ID and each element is a list of dictionaries
     mapping street names to the duration the traffic light is green.
     """
     with open(filename, 'r') as file:
@@ -99,4 +126,62 @@ def parse_submission_file(filename):
         if intersections[i] is None:
             intersections[i] = [{'street': 'default', 'duration': 0}]
 
-    return intersections
+    return Schedule(intersections)
+
+
+def get_top_results(results_file, instance_name, top_k):
+    """Get the best output files of an instance from a results CSV file.
+
+    Args:
+        results_file (str): Results CSV file written by the experiments, with 'output_file' and 'score' columns.
+        instance_name (str): Instance name, e.g. 'b_by_the_ocean'.
+        top_k (int): Number of output files to return.
+
+    Returns:
+        list: Output file names ordered by descending score.
+    """
+    with open(results_file, 'r') as result_file:
+        rows = list(csv.DictReader(result_file))
+
+    results = []
+    for row in rows:
+        # Results written on Windows use backslashes in the output paths
+        output_file = os.path.normpath(row['output_file'].replace('\\', '/'))
+        # Output files are named after the instance followed by the run number
+        name = get_instance_name(output_file)
+        if name.startswith(instance_name) and name[len(instance_name):].isdigit():
+            results.append((int(row['score']), output_file))
+    results.sort(key=lambda result: result[0], reverse=True)
+
+    return [output_file for _, output_file in results[:top_k]]
+
+
+def read_seed_solutions(sources, input_data, instance_name, top_k=3):
+    """Read solutions of earlier runs to seed the initial population with.
+
+    Args:
+        sources (list): Output files, or results CSV files to take the top_k output files of the instance from.
+        input_data (dict): Input data, used to repair the solutions.
+        instance_name (str): Instance name, e.g. 'b_by_the_ocean'.
+        top_k (int, optional): Number of output files taken from each results CSV file. Defaults to 3.
+
+    Returns:
+        list: Repaired solutions.
+    """
+    output_files = []
+    for source in sources:
+        if source.endswith('.csv'):
+            output_files.extend(get_top_results(source, instance_name, top_k))
+        else:
+            output_files.append(source)
+
+    solutions = []
+    for output_file in output_files:
+        if not os.path.exists(output_file):
+            print(f"Output file {output_file} does not exist. Skipping...")
+            continue
+        solutions.append(repair_solution(parse_submission_file(output_file),
+                                         input_data['streets'], input_data['number_of_intersections']))
+    print(f'Seeded {len(solutions)} solutions from earlier runs.')
+
+    return solutions
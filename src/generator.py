@@ -0,0 +1,128 @@
+import os
+import random
+import string
+
+
+def get_street_name(index):
+    """Get a unique street name made of lowercase letters, like the Hash Code inputs use.
+
+    Args:
+        index (int): Street index.
+
+    Returns:
+        str: Street name, e.g. 'a', 'z', 'ba'.
+    """
+    name = ''
+    while True:
+        index, letter = divmod(index, len(string.ascii_lowercase))
+        name = string.ascii_lowercase[letter] + name
+        if index == 0:
+            return name
+
+
+def generate_streets(number_of_intersections, number_of_streets, max_street_length, rng=random):
+    """Generate a street graph where every intersection has incoming and outgoing streets.
+
+    A ring through all intersections is laid first, the remaining streets connect random pairs of
+    intersections. No street starts and ends at the same intersection and no two streets connect the
+    same pair of intersections in the same direction.
+
+    Args:
+        number_of_intersections (int): Number of intersections, at least 2.
+        number_of_streets (int): Number of streets, at least the number of intersections.
+        max_street_length (int): Maximum street length in seconds.
+        rng (random.Random, optional): Random number generator. Defaults to the global random module.
+
+    Returns:
+        list: Streets as (start, end, name, length) tuples.
+    """
+    if number_of_intersections < 2:
+        raise ValueError('At least 2 intersections are needed.')
+    if not number_of_intersections <= number_of_streets <= number_of_intersections * (number_of_intersections - 1):
+        raise ValueError(
+            'The number of streets should be between the number of intersections and the number of intersection pairs.')
+
+    connections = set()
+    for i in range(number_of_intersections):
+        connections.add((i, (i + 1) % number_of_intersections))
+    while len(connections) < number_of_streets:
+        start = rng.randint(0, number_of_intersections - 1)
+        end = rng.randint(0, number_of_intersections - 1)
+        if start != end:
+            connections.add((start, end))
+
+    return [(start, end, get_street_name(index), rng.randint(1, max_street_length))
+            for index, (start, end) in enumerate(sorted(connections))]
+
+
+def generate_paths(streets, number_of_cars, min_path_length, max_path_length, rng=random):
+    """Generate car paths as random walks along the street graph.
+
+    Path lengths are drawn uniformly between the minimum and maximum. A walk ends early when all the
+    streets leaving its intersection are already on the path, since a path never repeats a street.
+
+    Args:
+        streets (list): Streets as (start, end, name, length) tuples.
+        number_of_cars (int): Number of cars.
+        min_path_length (int): Minimum number of streets per path, at least 2.
+        max_path_length (int): Maximum number of streets per path.
+        rng (random.Random, optional): Random number generator. Defaults to the global random module.
+
+    Returns:
+        list: Paths as lists of street names.
+    """
+    outgoing = {}
+    for street in streets:
+        outgoing.setdefault(street[0], []).append(street)
+
+    paths = []
+    for _ in range(number_of_cars):
+        path_length = rng.randint(min_path_length, max_path_length)
+        street = rng.choice(streets)
+        path = [street[2]]
+        used = {street[2]}
+        while len(path) < path_length:
+            candidates = [candidate for candidate in outgoing[street[1]]
+                          if candidate[2] not in used]
+            if not candidates:
+                break
+            street = rng.choice(candidates)
+            path.append(street[2])
+            used.add(street[2])
+        paths.append(path)
+    return paths
+
+
+def generate_instance(fname, number_of_intersections, number_of_streets, number_of_cars, duration, bonus=1000,
+                      min_path_length=2, max_path_length=20, max_street_length=10, rng=random):
+    """Write a synthetic input file in the format read_file parses.
+
+    Args:
+        fname (str): Input file name to write.
+        number_of_intersections (int): Number of intersections.
+        number_of_streets (int): Number of streets.
+        number_of_cars (int): Number of cars.
+        duration (int): Duration of simulation.
+        bonus (int, optional): Bonus per car reaching its destination. Defaults to 1000.
+        min_path_length (int, optional): Minimum number of streets per path. Defaults to 2.
+        max_path_length (int, optional): Maximum number of streets per path. Defaults to 20.
+        max_street_length (int, optional): Maximum street length in seconds. Defaults to 10.
+        rng (random.Random, optional): Random number generator. Defaults to the global random module.
+    """
+    if not 2 <= min_path_length <= max_path_length:
+        raise ValueError(
+            'Path lengths should be at least 2 and the minimum should not exceed the maximum.')
+
+    streets = generate_streets(
+        number_of_intersections, number_of_streets, max_street_length, rng)
+    paths = generate_paths(streets, number_of_cars,
+                           min_path_length, max_path_length, rng)
+
+    os.makedirs(os.path.dirname(fname) or '.', exist_ok=True)
+    with open(fname, 'w') as input_file:
+        input_file.write(
+            f'{duration} {number_of_intersections} {len(streets)} {len(paths)} {bonus}\n')
+        for start, end, name, length in streets:
+            input_file.write(f'{start} {end} {name} {length}\n')
+        for path in paths:
+            input_file.write(f'{len(path)} {" ".join(path)}\n')
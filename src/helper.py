@@ -1,23 +1,70 @@
 
+import functools
 import os
 import random
 
 
-def return_cycle_time(duration):
+def get_rng(seed=None, stream=0):
+    """Create the random number generator of an independent stream of a seeded run.
+
+    Every stream gets its own generator derived from the seed and the stream index only, so a
+    seeded run gives the same results no matter how its streams are spread over workers.
+
+    Args:
+        seed (int, optional): Seed of the run. Defaults to None, which gives an unseeded generator.
+        stream (int, optional): Index of the stream, e.g. of the input file or experiment. Defaults to 0.
+
+    Returns:
+        random.Random: Random number generator.
+    """
+    if seed is None:
+        return random.Random()
+    # String seeds are hashed with SHA-512, which keeps streams of neighbouring indices unrelated
+    return random.Random(f'{seed}:{stream}')
+
+
+@functools.lru_cache(maxsize=None)
+def get_divisors(duration):
+    """Get the divisors of the simulation duration, computed once per duration.
+
+    Args:
+        duration (int): simulation duration
+
+    Returns:
+        tuple: Divisors in ascending order
+    """
+    small = []
+    large = []
+    i = 1
+    while i * i <= duration:
+        if duration % i == 0:
+            small.append(i)
+            if i * i != duration:
+                large.append(duration // i)
+        i += 1
+    return tuple(small + large[::-1])
+
+
+def return_cycle_time(duration, rng=random, demand=None):
     """Given the simulation duration come up with a divisible cycle time
 
     Args:
         duration (int): simulation duration
+        rng (random.Random, optional): Random number generator. Defaults to the global random module.
+        demand (int, optional): Number of demanded streets at the intersection. When set, short cycle
+            times close to one second per demanded street are more likely. Defaults to None, which
+            picks any divisor with the same probability.
 
     Returns:
         int: Cycle time in seconds
     """
-    divisors = []
-    for i in range(1, duration + 1):
-        if duration % i == 0:
-            divisors.append(i)
-    choose = random.randint(0, len(divisors) - 1)
-    cycle_time = divisors[choose]
+    divisors = get_divisors(duration)
+    if demand is None:
+        choose = rng.randint(0, len(divisors) - 1)
+        cycle_time = divisors[choose]
+    else:
+        weights = [1 / (1 + abs(divisor - demand)) for divisor in divisors]
+        cycle_time = rng.choices(divisors, weights)[0]
     return cycle_time
 
 
@@ -39,3 +86,34 @@ def get_output_filename(input_filename):
     output_filename = os.path.join(output_dirname, output_basename)
 
     return output_filename
+
+
+def get_profile_prefix(output_filename):
+    """Get the path of the profile files, without extension, based on the output file name.
+
+    Args:
+        output_filename (str): Output file name.
+
+    Returns:
+        str: Profile path without extension.
+    """
+    dirname = os.path.dirname(output_filename)
+    basename = os.path.basename(output_filename)
+
+    profile_dirname = dirname.replace('output', 'profiles')
+    profile_basename = basename.split('.out.')[0]
+
+    return os.path.join(profile_dirname, profile_basename)
+
+
+def get_instance_name(filename):
+    """Get the instance name based on the input or output file name.
+
+    Args:
+        filename (str): Input or output file name.
+
+    Returns:
+        str: Instance name, e.g. 'f_forever_jammed'.
+    """
+    basename = os.path.basename(filename)
+    return basename.split('.')[0]
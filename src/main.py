@@ -1,18 +1,54 @@
-from file_management import read_file, write_file
-from helper import get_output_filename
-from algorithm import genetic_algorithm
+from file_management import read_file, read_seed_solutions, write_file
+from helper import get_instance_name, get_output_filename, get_profile_prefix, get_rng
+from profiling import profile_call
+from algorithm import DEFAULT_TIME_LIMIT, genetic_algorithm
+from multi_objective import nsga2
+from progress import ProgressReporter, RunControl
 from terminal import read_terminal
 
 
 def main():
-    parameters = read_terminal()
-    if parameters != 'experimental':
-        file_name = parameters[-1]
-        input_data = read_file(file_name)
+    args = read_terminal()
+    if args not in ('experimental', 'batch', 'server', 'generate', 'benchmark'):
+        output_file_name = get_output_filename(args.file_name)
+        parameters = (args.population_size, args.num_mutations,
+                      args.mutation_rate, args.inversion_rate, args.tournament)
 
-        best_solution = genetic_algorithm(input_data, parameters[:5])
-        write_file(best_solution, get_output_filename(file_name))
+        def run():
+            input_data = read_file(args.file_name)
+            initial_solutions = read_seed_solutions(
+                args.seed_from, input_data, get_instance_name(args.file_name), args.seed_top) if args.seed_from else None
 
+            # Stop early on SIGINT/SIGUSR1 and dump the best solution or Pareto archive so far on SIGUSR2
+            control = RunControl()
+            control.install()
+            try:
+                if args.multi_objective:
+                    archive = nsga2(
+                        input_data, parameters, DEFAULT_TIME_LIMIT, get_rng(args.seed), archive_size=args.archive_size,
+                        short_cycles=args.short_cycles, initial_solutions=initial_solutions,
+                        progress=ProgressReporter(DEFAULT_TIME_LIMIT, generations=args.generations), control=control,
+                        checkpoint=lambda archive: archive.export(output_file_name), generations=args.generations)
+                    archive.export(output_file_name)
+                    # The solution with the best score is also written as the regular output
+                    return archive.solutions[min(range(len(archive.solutions)),
+                                                 key=lambda i: archive.objectives[i])]
+                return genetic_algorithm(
+                    input_data, parameters, DEFAULT_TIME_LIMIT, get_rng(args.seed), short_cycles=args.short_cycles,
+                    surrogate_fraction=args.surrogate_fraction,
+                    progress=ProgressReporter(DEFAULT_TIME_LIMIT, generations=args.generations), control=control,
+                    checkpoint=lambda solution: write_file(solution, output_file_name),
+                    initial_solutions=initial_solutions, targeted_mutation=args.targeted_mutation,
+                    generations=args.generations)
+            finally:
+                control.restore()
+
+        if args.profile:
+            best_solution = profile_call(get_instance_name(args.file_name), get_profile_prefix(output_file_name),
+                                         run, top=args.profile_top)
+        else:
+            best_solution = run()
+        write_file(best_solution, output_file_name)
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,298 @@
+from algorithm import DEFAULT_TIME_LIMIT, crossover, evaluate_solution, init_solution, inversion, mutate
+from congestion import CongestionIndex
+from file_management import write_file
+from representation import get_intersection_demand
+
+import random
+import time
+
+
+def get_objectives(input_data, solution):
+    """Get the objectives of a solution from a single simulation, all to be minimized.
+
+    Args:
+        input_data (dict): Input data.
+        solution (Schedule): Solution list containing the intersection schedules.
+
+    Returns:
+        tuple: Negated score, longest time a car waits at a red light and longest cycle time.
+    """
+    congestion = CongestionIndex()
+    score = evaluate_solution(input_data, solution, congestion)
+    return -score, congestion.max_wait_time, max(solution.cycle_times, default=0)
+
+
+def dominates(objectives1, objectives2):
+    """Check whether the first objectives Pareto-dominate the second ones.
+
+    Args:
+        objectives1 (tuple): Objectives to be minimized.
+        objectives2 (tuple): Objectives to be minimized.
+
+    Returns:
+        bool: True if the first are nowhere worse and somewhere better.
+    """
+    return all(a <= b for a, b in zip(objectives1, objectives2)) and objectives1 != objectives2
+
+
+def fast_non_dominated_sort(objectives):
+    """Sort solutions into Pareto fronts in O(MN^2).
+
+    Args:
+        objectives (list): Objectives of every solution.
+
+    Returns:
+        list: Fronts as lists of solution indices, the non-dominated front first.
+    """
+    dominated = [[] for _ in objectives]
+    domination_count = [0] * len(objectives)
+    fronts = [[]]
+    for p in range(len(objectives)):
+        for q in range(len(objectives)):
+            if dominates(objectives[p], objectives[q]):
+                dominated[p].append(q)
+            elif dominates(objectives[q], objectives[p]):
+                domination_count[p] += 1
+        if domination_count[p] == 0:
+            fronts[0].append(p)
+
+    while fronts[-1]:
+        next_front = []
+        for p in fronts[-1]:
+            for q in dominated[p]:
+                domination_count[q] -= 1
+                if domination_count[q] == 0:
+                    next_front.append(q)
+        fronts.append(next_front)
+
+    return fronts[:-1]
+
+
+def crowding_distance(front, objectives):
+    """Get the crowding distance of every solution of a front.
+
+    Args:
+        front (list): Solution indices of the front.
+        objectives (list): Objectives of every solution.
+
+    Returns:
+        dict: Crowding distance per solution index, infinite at the ends of the front.
+    """
+    distance = {index: 0.0 for index in front}
+    for m in range(len(objectives[front[0]])):
+        ordered = sorted(front, key=lambda index: objectives[index][m])
+        lowest = objectives[ordered[0]][m]
+        highest = objectives[ordered[-1]][m]
+        distance[ordered[0]] = distance[ordered[-1]] = float('inf')
+        if highest == lowest:
+            continue
+        for i in range(1, len(ordered) - 1):
+            distance[ordered[i]] += (objectives[ordered[i + 1]][m] -
+                                     objectives[ordered[i - 1]][m]) / (highest - lowest)
+    return distance
+
+
+def rank_population(objectives):
+    """Get the Pareto rank and crowding distance of every solution.
+
+    Args:
+        objectives (list): Objectives of every solution.
+
+    Returns:
+        tuple: Rank per solution index and crowding distance per solution index.
+    """
+    rank = [0] * len(objectives)
+    distance = [0.0] * len(objectives)
+    for front_rank, front in enumerate(fast_non_dominated_sort(objectives)):
+        for index, front_distance in crowding_distance(front, objectives).items():
+            rank[index] = front_rank
+            distance[index] = front_distance
+    return rank, distance
+
+
+def crowded_tournament(rank, distance, rng=random):
+    """Pick a parent by binary tournament on Pareto rank, then crowding distance.
+
+    Args:
+        rank (list): Rank per solution index.
+        distance (list): Crowding distance per solution index.
+        rng (random.Random, optional): Random number generator. Defaults to the global random module.
+
+    Returns:
+        int: Index of the winner.
+    """
+    a = rng.randint(0, len(rank) - 1)
+    b = rng.randint(0, len(rank) - 1)
+    return min(a, b, key=lambda index: (rank[index], -distance[index]))
+
+
+class ParetoArchive:
+    """Bounded archive of the non-dominated solutions found so far.
+
+    When the archive is full, the most crowded solution is dropped, so the ends of the front are kept.
+    """
+
+    def __init__(self, max_size):
+        """Create an empty archive.
+
+        Args:
+            max_size (int): Maximum number of solutions kept.
+        """
+        self.max_size = max_size
+        self.solutions = []
+        self.objectives = []
+
+    def add(self, solution, objectives):
+        """Add a solution unless an archived one dominates or equals it.
+
+        Args:
+            solution (Schedule): Solution.
+            objectives (tuple): Objectives of the solution.
+
+        Returns:
+            bool: True if the solution was archived.
+        """
+        if any(dominates(archived, objectives) or archived == objectives for archived in self.objectives):
+            return False
+
+        kept = [i for i in range(len(self.objectives))
+                if not dominates(objectives, self.objectives[i])]
+        self.solutions = [self.solutions[i] for i in kept] + [solution]
+        self.objectives = [self.objectives[i] for i in kept] + [objectives]
+
+        if len(self.solutions) > self.max_size:
+            distance = crowding_distance(
+                list(range(len(self.objectives))), self.objectives)
+            most_crowded = min(distance, key=distance.get)
+            del self.solutions[most_crowded]
+            del self.objectives[most_crowded]
+        return True
+
+    def export(self, output_filename):
+        """Write every archived solution to its own output file, ordered by descending score.
+
+        Args:
+            output_filename (str): Output file name, e.g. '../data/output/b_by_the_ocean.out.txt'. Solution k is
+                written to '../data/output/b_by_the_ocean_pareto<k>.out.txt'.
+
+        Returns:
+            list: Output file names.
+        """
+        output_filenames = []
+        order = sorted(range(len(self.solutions)),
+                       key=lambda i: self.objectives[i])
+        print('{:<8} {:>14} {:>14} {:>14}'.format(
+            'Solution', 'Score', 'Longest Wait', 'Longest Cycle'))
+        for k, i in enumerate(order, start=1):
+            fname = output_filename.replace('.out.', f'_pareto{k}.out.')
+            write_file(self.solutions[i], fname)
+            output_filenames.append(fname)
+            score, longest_wait, longest_cycle = self.objectives[i]
+            print('{:<8} {:>14} {:>14} {:>14}'.format(
+                k, -score, longest_wait, longest_cycle))
+        return output_filenames
+
+
+def nsga2(input_data, parameters, time_limit=DEFAULT_TIME_LIMIT, rng=random, archive_size=10, short_cycles=False,
+          initial_solutions=None, progress=None, control=None, checkpoint=None, generations=None):
+    """Runs NSGA-II on the score, the longest wait at a red light and the longest cycle time.
+
+    Uses the operators of the genetic algorithm. Parents are picked by crowded binary tournament, so the
+    tournament flag is ignored. Every solution is simulated exactly once.
+
+    Args:
+        input_data (dict): Input data.
+        parameters (tuple): Genetic algorithm parameters.
+        time_limit (float, optional): Time budget of the run in seconds. Defaults to 3 minutes.
+        rng (random.Random, optional): Random number generator. Defaults to the global random module.
+        archive_size (int, optional): Maximum number of solutions in the Pareto archive. Defaults to 10.
+        short_cycles (bool, optional): Bias the initial cycle times towards short, demand-proportional ones. Defaults to False.
+        initial_solutions (list, optional): Solutions of earlier runs placed in the initial population. Defaults to None.
+        progress (ProgressReporter, optional): Reporter refreshed while the offspring of every generation are
+            evaluated. Defaults to None.
+        control (RunControl, optional): Signal state checked after every generation to stop early or dump the
+            archive. Defaults to None.
+        checkpoint (callable, optional): Called with the Pareto archive so far when a dump is requested. Defaults to None.
+        generations (int, optional): Number of generations to run instead of running until the time limit. Defaults to None.
+
+    Returns:
+        ParetoArchive: Archive of the non-dominated solutions found.
+    """
+    start_time = time.time()
+    population_size, num_mutations, mutation_rate, inversion_rate, _ = parameters
+
+    streets = input_data['streets']
+    number_of_intersections = input_data['number_of_intersections']
+    demand = get_intersection_demand(
+        streets, input_data['cars'], number_of_intersections) if short_cycles else None
+
+    population = list(initial_solutions or [])[:population_size]
+    for i in range(population_size - len(population)):
+        population.append(init_solution(
+            streets, number_of_intersections, input_data['duration'], rng, demand))
+    objectives = [get_objectives(input_data, solution)
+                  for solution in population]
+
+    archive = ParetoArchive(archive_size)
+    for solution, solution_objectives in zip(population, objectives):
+        archive.add(solution, solution_objectives)
+
+    generation = 0
+    while (generation < generations) if generations is not None else (time.time() - start_time < time_limit):
+        rank, distance = rank_population(objectives)
+
+        offspring = []
+        while len(offspring) < population_size:
+            parentA = population[crowded_tournament(rank, distance, rng)]
+            parentB = population[crowded_tournament(rank, distance, rng)]
+            for child in crossover([parentA, parentB], rng):
+                if rng.random() < mutation_rate:
+                    child, _ = mutate(child, num_mutations, rng)
+                if rng.random() < inversion_rate:
+                    child = inversion(child, rng)
+                offspring.append(child)
+        # Crossover makes two children, so an odd population size leaves one too many
+        offspring = offspring[:population_size]
+        offspring_objectives = []
+        for i, child in enumerate(offspring):
+            offspring_objectives.append(get_objectives(input_data, child))
+            if progress is not None:
+                progress.update(generation, (generation + 1) * population_size + i + 1,
+                                -min(archived[0] for archived in archive.objectives))
+
+        for child, child_objectives in zip(offspring, offspring_objectives):
+            archive.add(child, child_objectives)
+
+        # Elitist survival: the best fronts of parents and offspring together, the last one cut by crowding
+        combined = population + offspring
+        combined_objectives = objectives + offspring_objectives
+        survivors = []
+        for front in fast_non_dominated_sort(combined_objectives):
+            if len(survivors) + len(front) <= population_size:
+                survivors.extend(front)
+                continue
+            front_distance = crowding_distance(front, combined_objectives)
+            front.sort(key=lambda index: front_distance[index], reverse=True)
+            survivors.extend(front[:population_size - len(survivors)])
+            break
+
+        population = [combined[i] for i in survivors]
+        objectives = [combined_objectives[i] for i in survivors]
+        generation += 1
+
+        if progress is not None:
+            progress.update(generation, (generation + 1) * population_size,
+                            -min(archived[0] for archived in archive.objectives))
+        if control is not None:
+            if control.dump_requested and checkpoint is not None:
+                control.dump_requested = False
+                checkpoint(archive)
+            if control.stop_requested:
+                break
+
+    if progress is not None:
+        progress.finish()
+    print('Pareto archive of {} solutions after {} generations.'.format(
+        len(archive.solutions), generation))
+
+    return archive
@@ -0,0 +1,186 @@
+import collections
+import cProfile
+import os
+import pstats
+import signal
+import sys
+
+
+class StackSampler:
+    """Sampling profiler collecting the call stacks of the main thread on a CPU time interval timer.
+
+    Only available on platforms that have SIGPROF and setitimer.
+    """
+
+    def __init__(self, interval=0.005):
+        """Create a stack sampler.
+
+        Args:
+            interval (float, optional): Seconds of CPU time between two samples. Defaults to 0.005.
+        """
+        self.interval = interval
+        self.stacks = collections.Counter()
+        self.previous_handler = None
+
+    @staticmethod
+    def available():
+        """Check whether stack sampling is supported on this platform.
+
+        Returns:
+            bool: True if SIGPROF and setitimer are available.
+        """
+        return hasattr(signal, 'SIGPROF') and hasattr(signal, 'setitimer')
+
+    def start(self):
+        """Start sampling."""
+        self.previous_handler = signal.signal(signal.SIGPROF, self.sample)
+        signal.setitimer(signal.ITIMER_PROF, self.interval, self.interval)
+
+    def stop(self):
+        """Stop sampling."""
+        signal.setitimer(signal.ITIMER_PROF, 0)
+        signal.signal(signal.SIGPROF, self.previous_handler)
+
+    def sample(self, signal_number, frame):
+        """Signal handler recording the current call stack."""
+        stack = []
+        while frame is not None:
+            stack.append(get_frame_name(frame.f_code.co_filename,
+                         frame.f_code.co_firstlineno, frame.f_code.co_name))
+            frame = frame.f_back
+        self.stacks[';'.join(reversed(stack))] += 1
+
+
+def get_frame_name(filename, line_number, function_name):
+    """Get the name of a function as shown in the collapsed stacks.
+
+    Args:
+        filename (str): File the function is defined in.
+        line_number (int): Line the function is defined at.
+        function_name (str): Function name.
+
+    Returns:
+        str: Function name with its file and line.
+    """
+    return f'{function_name} ({os.path.basename(filename)}:{line_number})'
+
+
+def collapse_stats(stats):
+    """Approximate collapsed stacks from cProfile statistics when no stack samples are available.
+
+    cProfile only records caller/callee pairs, so every stack has two levels and is weighted by the
+    time in microseconds spent in the callee when called from that caller.
+
+    Args:
+        stats (pstats.Stats): Profile statistics.
+
+    Returns:
+        collections.Counter: Weight per collapsed stack.
+    """
+    stacks = collections.Counter()
+    for function, (_, _, total_time, _, callers) in stats.stats.items():
+        name = get_frame_name(*function)
+        if not callers:
+            stacks[name] += int(total_time * 1e6)
+        for caller, caller_stats in callers.items():
+            stacks[get_frame_name(*caller) + ';' +
+                   name] += int(caller_stats[2] * 1e6)
+    return stacks
+
+
+def remove_sampler_calls(stats):
+    """Remove the calls made by the stack sampler from profile statistics.
+
+    The sampler runs as a signal handler inside whatever function it interrupts, so cProfile records it as
+    a call from that function. Its own functions are dropped, and their time is taken off the functions that
+    they called or interrupted. Functions further up the stack still include the small sampling overhead
+    in their cumulative time.
+
+    Args:
+        stats (pstats.Stats): Profile statistics, modified in place.
+    """
+    sampler_functions = {cProfile.label(code) for code in (
+        StackSampler.sample.__code__, get_frame_name.__code__)}
+    interrupted = collections.Counter()
+    for function in sampler_functions:
+        if function in stats.stats:
+            for caller, (_, _, _, total_time) in stats.stats.pop(function)[4].items():
+                interrupted[caller] += total_time
+
+    for function, (primitive_calls, calls, inline_time, total_time, callers) in list(stats.stats.items()):
+        # Caller entries are ordered (calls, primitive calls, inline time, total time)
+        for caller in sampler_functions & callers.keys():
+            caller_calls, caller_primitive_calls, caller_inline_time, caller_total_time = callers.pop(
+                caller)
+            calls -= caller_calls
+            primitive_calls -= caller_primitive_calls
+            inline_time -= caller_inline_time
+            total_time -= caller_total_time
+        if calls <= 0:
+            del stats.stats[function]
+        else:
+            stats.stats[function] = (primitive_calls, calls, inline_time,
+                                     max(0, total_time - interrupted[function]), callers)
+
+    stats.total_calls = stats.prim_calls = 0
+    stats.total_tt = 0
+    stats.get_top_level_stats()
+
+
+def write_collapsed_stacks(stacks, fname):
+    """Write collapsed stacks in the text format read by flame graph tools.
+
+    Args:
+        stacks (collections.Counter): Weight per collapsed stack.
+        fname (str): Output filename.
+    """
+    with open(fname, 'w') as collapsed_file:
+        for stack, weight in sorted(stacks.items()):
+            if weight > 0:
+                collapsed_file.write(f'{stack} {weight}\n')
+
+
+def profile_call(instance_name, profile_prefix, function, *args, top=20, **kwargs):
+    """Run a function under cProfile and report its hot paths.
+
+    Writes '<profile_prefix>.pstats' and '<profile_prefix>.collapsed.txt' and prints the top functions
+    by cumulative time. The collapsed stacks come from a stack sampler running alongside cProfile
+    when the platform supports it and are approximated from the cProfile statistics otherwise. The calls
+    made by the sampler are removed from the statistics, so that its overhead is not reported as a hot path.
+
+    Args:
+        instance_name (str): Name of the profiled instance shown in the report.
+        profile_prefix (str): Path of the profile files without extension.
+        function (callable): Function to profile.
+        top (int, optional): Number of functions to print. Defaults to 20.
+
+    Returns:
+        Any: Return value of the function.
+    """
+    profiler = cProfile.Profile()
+    sampler = StackSampler() if StackSampler.available() else None
+
+    if sampler is not None:
+        sampler.start()
+    profiler.enable()
+    try:
+        result = function(*args, **kwargs)
+    finally:
+        profiler.disable()
+        if sampler is not None:
+            sampler.stop()
+
+    stats = pstats.Stats(profiler, stream=sys.stdout)
+    if sampler is not None:
+        remove_sampler_calls(stats)
+
+    os.makedirs(os.path.dirname(profile_prefix) or '.', exist_ok=True)
+    stats.dump_stats(profile_prefix + '.pstats')
+    stacks = sampler.stacks if sampler is not None and sampler.stacks else collapse_stats(
+        stats)
+    write_collapsed_stacks(stacks, profile_prefix + '.collapsed.txt')
+
+    print(f'Top {top} functions by cumulative time for {instance_name}:')
+    stats.sort_stats('cumulative').print_stats(top)
+
+    return result
@@ -0,0 +1,109 @@
+import signal
+import sys
+import time
+
+
+class ProgressReporter:
+    """Report the progress of a genetic algorithm run on a single line that is refreshed in place.
+
+    The line is rewritten at most once per interval, so calling update for every offspring stays cheap.
+    """
+
+    def __init__(self, time_limit, interval=1.0, stream=sys.stderr, generations=None):
+        """Create a progress reporter.
+
+        Args:
+            time_limit (float): Time budget of the run in seconds, used for the ETA.
+            interval (float, optional): Minimum number of seconds between two refreshes. Defaults to 1.0.
+            stream (file, optional): Stream to report to. Defaults to sys.stderr.
+            generations (int, optional): Number of generations of the run, estimates the ETA from the time per
+                generation instead of the time limit. Defaults to None.
+        """
+        self.time_limit = time_limit
+        self.generations = generations
+        self.interval = interval
+        self.stream = stream
+        self.start_time = time.time()
+        self.last_report = 0
+
+    def update(self, generation, evaluations, best_score, force=False):
+        """Refresh the progress line if the interval has passed.
+
+        Args:
+            generation (int): Number of finished generations.
+            evaluations (int): Number of solution evaluations so far.
+            best_score (int): Score of the best solution so far.
+            force (bool, optional): Refresh even if the interval has not passed. Defaults to False.
+        """
+        now = time.time()
+        if not force and now - self.last_report < self.interval:
+            return
+        self.last_report = now
+
+        elapsed = now - self.start_time
+        evaluations_per_second = evaluations / elapsed if elapsed > 0 else 0
+        if self.generations is None:
+            eta = '{:.0f}s'.format(max(0, self.time_limit - elapsed))
+        elif generation:
+            eta = '{:.0f}s'.format(
+                elapsed / generation * max(0, self.generations - generation))
+        else:
+            # No generation has finished yet to estimate the time per generation from
+            eta = '?'
+        self.stream.write('\rGeneration {} | {:.1f} evals/s | Best {} | ETA {}  '.format(
+            generation, evaluations_per_second, best_score, eta))
+        self.stream.flush()
+
+    def finish(self):
+        """End the progress line."""
+        self.stream.write('\n')
+        self.stream.flush()
+
+
+class RunControl:
+    """Control a running genetic algorithm through signals.
+
+    SIGINT and SIGUSR1 ask the run to stop after the current generation, SIGUSR2 asks it to dump
+    the best solution so far and keep going. A second SIGINT stops the process right away.
+    SIGUSR1 and SIGUSR2 are only available on platforms that have them.
+    """
+
+    def __init__(self):
+        self.stop_requested = False
+        self.dump_requested = False
+        self.previous_handlers = {}
+
+    def install(self):
+        """Install the signal handlers."""
+        self.set_handler(signal.SIGINT, self.request_stop)
+        if hasattr(signal, 'SIGUSR1'):
+            self.set_handler(signal.SIGUSR1, self.request_stop)
+        if hasattr(signal, 'SIGUSR2'):
+            self.set_handler(signal.SIGUSR2, self.request_dump)
+
+    def restore(self):
+        """Restore the signal handlers that were active before install."""
+        for signal_number, handler in self.previous_handlers.items():
+            signal.signal(signal_number, handler)
+        self.previous_handlers = {}
+
+    def set_handler(self, signal_number, handler):
+        """Set a signal handler, remembering the previous one.
+
+        Args:
+            signal_number (int): Signal number.
+            handler (callable): Signal handler.
+        """
+        previous_handler = signal.signal(signal_number, handler)
+        self.previous_handlers.setdefault(signal_number, previous_handler)
+
+    def request_stop(self, signal_number, frame):
+        """Signal handler asking the run to stop after the current generation."""
+        self.stop_requested = True
+        if signal_number == signal.SIGINT:
+            # Let a second Ctrl+C interrupt the run immediately
+            signal.signal(signal.SIGINT, signal.default_int_handler)
+
+    def request_dump(self, signal_number, frame):
+        """Signal handler asking the run to dump the best solution so far."""
+        self.dump_requested = True
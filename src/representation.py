@@ -32,11 +32,175 @@ def get_cars(lines, streets, number_of_streets, number_of_cars):
     number = 0
     for line in lines[number_of_streets + 1: number_of_streets + 1 + number_of_cars]:
         path = [street for street in line.split(' ')[1:]]
+        # Time left to drive from the end of each street of the path to the destination
+        remaining_time = [0] * len(path)
+        for i in range(len(path) - 2, -1, -1):
+            remaining_time[i] = remaining_time[i + 1] + \
+                streets[path[i + 1]]['length']
         cars[number] = {
             'path': path,
             'current': path[0],
             'left_in_current': streets[path[0]]['length'],
-            'final': path[-1]
+            'final': path[-1],
+            'total_time': remaining_time[0],
+            'remaining_time': remaining_time
         }
         number += 1
     return cars
+
+
+def split_reachable_cars(cars, duration):
+    """Split cars into the ones that can finish their path within the simulation and the ones that can not.
+
+    A car can never finish if driving its path without waiting at any light already takes the whole duration.
+
+    Args:
+        cars (list): List of car information data
+        duration (int): Duration of simulation
+
+    Returns:
+        tuple: Reachable cars and unreachable cars
+    """
+    reachable = []
+    unreachable = []
+    for car in cars:
+        if car['total_time'] < duration:
+            reachable.append(car)
+        else:
+            unreachable.append(car)
+    return reachable, unreachable
+
+
+def get_intersection_demand(streets, cars, number_of_intersections):
+    """Count the demanded streets per intersection, i.e. incoming streets that are on the path of at least one car.
+
+    Args:
+        streets (dict): Street information
+        cars (list): List of car information data
+        number_of_intersections (int): Number of intersections
+
+    Returns:
+        list: Number of demanded streets per intersection
+    """
+    demanded_streets = set()
+    for car in cars:
+        demanded_streets.update(car['path'])
+
+    demand = [0] * number_of_intersections
+    for street in demanded_streets:
+        demand[streets[street]['end']] += 1
+    return demand
+
+
+def get_street_demand(cars):
+    """Count the cars waiting at the end of each street, i.e. passing it on the way to their destination.
+
+    Args:
+        cars (list): List of car information data
+
+    Returns:
+        dict: Number of cars per street name
+    """
+    demand = {}
+    for car in cars:
+        for street in car['path'][:-1]:
+            demand[street] = demand.get(street, 0) + 1
+    return demand
+
+
+def repair_solution(solution, streets, number_of_intersections):
+    """Repair a solution read from another run so that it fits the input graph.
+
+    Streets keep the order of the submission, since the order of the green lights affects the score. Streets
+    that do not exist, do not end at the intersection or are listed twice are dropped, together with the
+    placeholders of skipped intersections. Incoming streets missing from an intersection, such as the ones
+    that never got green in the submission, are appended with a duration of 0. Crossover matches streets by
+    name, so repaired solutions can be combined with solutions in any other order.
+
+    Args:
+        solution (list): Solution list of intersections
+        streets (dict): Street information
+        number_of_intersections (int): Number of intersections
+
+    Returns:
+        Schedule: Repaired solution
+    """
+    incoming_streets = [[] for _ in range(number_of_intersections)]
+    for name, street in streets.items():
+        incoming_streets[street['end']].append(name)
+
+    intersections = []
+    for i in range(number_of_intersections):
+        schedule = solution[i] if i < len(solution) else []
+        intersection = []
+        scheduled_streets = set()
+        for street in schedule:
+            name = street['street']
+            if name in streets and streets[name]['end'] == i and name not in scheduled_streets:
+                intersection.append({'street': name, 'duration': street['duration']})
+                scheduled_streets.add(name)
+        for name in incoming_streets[i]:
+            if name not in scheduled_streets:
+                intersection.append({'street': name, 'duration': 0})
+        intersections.append(intersection)
+
+    return Schedule(intersections)
+
+
+class Schedule(list):
+    """Solution list of intersection schedules that keeps its duration statistics up to date.
+
+    Every intersection's cycle time and number of streets with a green light, the number of scheduled
+    intersections and the solution-wide total duration are computed once and then updated in O(1)
+    per change. Durations have to be changed through set_duration or swap_durations to keep them correct.
+    """
+
+    def __init__(self, intersections=()):
+        """Create a schedule and compute its statistics.
+
+        Args:
+            intersections (list, optional): List of intersections, each a list of dictionaries with 'street'
+                and 'duration' keys. Defaults to an empty schedule.
+        """
+        super().__init__(intersections)
+        self.cycle_times = [sum(street['duration'] for street in intersection)
+                            for intersection in self]
+        self.green_streets = [sum(street['duration'] > 0 for street in intersection)
+                              for intersection in self]
+        self.scheduled_intersections = sum(
+            cycle_time > 0 for cycle_time in self.cycle_times)
+        self.total_duration = sum(self.cycle_times)
+
+    def set_duration(self, intersection_index, street_index, duration):
+        """Set the green light duration of a street and update the statistics.
+
+        Args:
+            intersection_index (int): Intersection index
+            street_index (int): Index of the street within the intersection
+            duration (int): New duration in seconds
+        """
+        street = self[intersection_index][street_index]
+        old_duration = street['duration']
+        old_cycle_time = self.cycle_times[intersection_index]
+        street['duration'] = duration
+
+        self.cycle_times[intersection_index] += duration - old_duration
+        self.total_duration += duration - old_duration
+        self.green_streets[intersection_index] += (
+            duration > 0) - (old_duration > 0)
+        self.scheduled_intersections += (
+            self.cycle_times[intersection_index] > 0) - (old_cycle_time > 0)
+
+    def swap_durations(self, intersection_index, street_index1, street_index2):
+        """Swap the green light durations of two streets of the same intersection.
+
+        The statistics do not change, since the intersection keeps the same set of durations.
+
+        Args:
+            intersection_index (int): Intersection index
+            street_index1 (int): Index of the first street within the intersection
+            street_index2 (int): Index of the second street within the intersection
+        """
+        intersection = self[intersection_index]
+        intersection[street_index1]['duration'], intersection[street_index2]['duration'] = \
+            intersection[street_index2]['duration'], intersection[street_index1]['duration']
@@ -0,0 +1,406 @@
+from algorithm import DEFAULT_TIME_LIMIT, genetic_algorithm
+from file_management import parse_input, write_solution
+from helper import get_rng
+
+import asyncio
+import collections
+import concurrent.futures
+import hashlib
+import io
+import json
+import multiprocessing
+import urllib.parse
+
+# Genetic algorithm parameters used for the query parameters a submission leaves out
+DEFAULT_PARAMETERS = {
+    'population_size': 10,
+    'num_mutations': 5,
+    'mutation_rate': 0.2,
+    'inversion_rate': 0.2,
+    'tournament': False
+}
+
+# Number of parsed instances kept in memory, least recently submitted ones are dropped first
+MAX_CACHED_INSTANCES = 16
+
+# Number of finished jobs kept, least recently finished or resubmitted ones are dropped first
+MAX_FINISHED_JOBS = 100
+
+STATUS_REASONS = {200: 'OK', 201: 'Created', 400: 'Bad Request',
+                  404: 'Not Found', 405: 'Method Not Allowed'}
+
+
+def parse_instance(content, instance_name):
+    """Parse an uploaded input file and check that the genetic algorithm can run on it.
+
+    Args:
+        content (str): Content of the input file.
+        instance_name (str): Instance name used when reporting on the input.
+
+    Raises:
+        ValueError: If the content is not a valid input file.
+
+    Returns:
+        dict: Input data.
+    """
+    lines = content.splitlines()
+    try:
+        input_data = parse_input(lines, instance_name)
+    except (IndexError, KeyError, TypeError, ValueError) as error:
+        raise ValueError(f'Malformed input file: {error!r}')
+
+    number_of_intersections = input_data['number_of_intersections']
+    if number_of_intersections < 1:
+        raise ValueError('The input file has no intersections.')
+    if len(lines) < 1 + input_data['number_of_streets'] + input_data['number_of_cars'] or \
+            len(input_data['streets']) != input_data['number_of_streets']:
+        raise ValueError('The input file has fewer streets or cars than its header declares.')
+    for name, street in input_data['streets'].items():
+        if not 0 <= street['start'] < number_of_intersections or not 0 <= street['end'] < number_of_intersections:
+            raise ValueError(f'Street {name} connects unknown intersections.')
+    return input_data
+
+
+def get_run_settings(query):
+    """Read the genetic algorithm parameters, time limit, seed and number of generations of a submission.
+
+    Args:
+        query (dict): Query parameters of the submission.
+
+    Raises:
+        ValueError: If a query parameter can not be converted or is out of range.
+
+    Returns:
+        dict: Run settings, with defaults for the query parameters left out.
+    """
+    settings = dict(DEFAULT_PARAMETERS)
+    for name, default in DEFAULT_PARAMETERS.items():
+        if name in query:
+            value = query[name][0]
+            settings[name] = value.lower() in (
+                '1', 'true') if isinstance(default, bool) else type(default)(value)
+    settings['time_limit'] = float(
+        query.get('time_limit', [DEFAULT_TIME_LIMIT])[0])
+    settings['seed'] = int(query['seed'][0]) if 'seed' in query else None
+    settings['generations'] = int(
+        query['generations'][0]) if 'generations' in query else None
+
+    if settings['population_size'] < 2:
+        raise ValueError('population_size should be at least 2.')
+    if settings['num_mutations'] < 1:
+        raise ValueError('num_mutations should be at least 1.')
+    if not 0 <= settings['mutation_rate'] <= 1 or not 0 <= settings['inversion_rate'] <= 1:
+        raise ValueError('mutation_rate and inversion_rate should be between 0 and 1.')
+    if not settings['time_limit'] > 0:
+        raise ValueError('time_limit should be positive.')
+    if settings['generations'] is not None and settings['generations'] < 1:
+        raise ValueError('generations should be at least 1.')
+    return settings
+
+
+def run_job(job_id, input_data, settings, updates):
+    """Run the genetic algorithm on a submitted instance inside a worker process.
+
+    Every improvement of the best solution is put on the updates queue as ('improvement', job id, score, schedule),
+    where the schedule is the solution in the submission file format. The job ends with ('end', job id, status)
+    on the same queue, after all of its improvements.
+
+    Args:
+        job_id (str): Job id.
+        input_data (dict): Input data of the instance.
+        settings (dict): Run settings read by get_run_settings.
+        updates (Queue): Queue shared with the server.
+    """
+    def on_improvement(solution, score):
+        schedule = io.StringIO()
+        write_solution(solution, schedule)
+        updates.put(('improvement', job_id, score, schedule.getvalue()))
+
+    parameters = tuple(settings[name] for name in DEFAULT_PARAMETERS)
+    try:
+        genetic_algorithm(input_data, parameters, settings['time_limit'], get_rng(settings['seed']),
+                          on_improvement=on_improvement, generations=settings['generations'])
+        status = 'done'
+    except Exception as error:
+        status = f'failed: {error!r}'
+    updates.put(('end', job_id, status))
+
+
+class JobServer:
+    """Local HTTP server running submitted instances on a bounded process pool.
+
+    Routes:
+        POST /instances: Submit the content of an input file. Query parameters population_size, num_mutations,
+            mutation_rate, inversion_rate, tournament, time_limit, seed and generations configure the run. Parsed
+            instances are cached by the SHA-256 hash of their content and jobs by that hash and their settings,
+            so resubmitting an instance with the same settings returns the existing job. Failed jobs are rerun.
+            Only the last MAX_CACHED_INSTANCES instances and MAX_FINISHED_JOBS finished jobs are kept.
+        GET /instances/<id>: Status, best score and score history of a job.
+        GET /instances/<id>/scores: Stream of best scores as JSON lines until the job is done.
+        GET /instances/<id>/schedule: Current best schedule in the submission file format.
+    """
+
+    def __init__(self, workers):
+        """Create a job server.
+
+        Args:
+            workers (int): Maximum number of instances optimized at the same time.
+        """
+        self.pool = concurrent.futures.ProcessPoolExecutor(workers)
+        self.manager = multiprocessing.Manager()
+        self.updates = self.manager.Queue()
+        self.instances = collections.OrderedDict()
+        self.jobs = {}
+        self.finished_jobs = collections.OrderedDict()
+        self.changed = None
+
+    async def serve(self, host, port):
+        """Serve until cancelled.
+
+        Args:
+            host (str): Host to listen on.
+            port (int): Port to listen on.
+        """
+        self.changed = asyncio.Condition()
+        listener = asyncio.create_task(self.listen_for_updates())
+        server = await asyncio.start_server(self.handle_connection, host, port)
+        print(f'Serving on http://{host}:{port}')
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            listener.cancel()
+            self.pool.shutdown(cancel_futures=True)
+            self.manager.shutdown()
+
+    async def listen_for_updates(self):
+        """Move the improvements and end-of-job messages reported by the workers into the job states."""
+        loop = asyncio.get_running_loop()
+        while True:
+            message = await loop.run_in_executor(None, self.updates.get)
+            job = self.jobs[message[1]]
+            if message[0] == 'improvement':
+                job['scores'].append(message[2])
+                job['schedule'] = message[3]
+            else:
+                job['status'] = message[2]
+                self.mark_finished(message[1])
+            await self.notify()
+
+    def mark_finished(self, job_id):
+        """Remember that a job finished and drop the least recently used finished jobs beyond MAX_FINISHED_JOBS.
+
+        Running jobs are never dropped, so every message of a worker still finds its job.
+
+        Args:
+            job_id (str): Job id.
+        """
+        self.finished_jobs[job_id] = None
+        self.finished_jobs.move_to_end(job_id)
+        while len(self.finished_jobs) > MAX_FINISHED_JOBS:
+            old_job_id, _ = self.finished_jobs.popitem(last=False)
+            del self.jobs[old_job_id]
+
+    async def notify(self):
+        """Wake up every stream waiting for a job to change."""
+        async with self.changed:
+            self.changed.notify_all()
+
+    def submit(self, content, query):
+        """Start optimizing an instance unless it was submitted before with the same settings.
+
+        Args:
+            content (str): Content of the input file.
+            query (dict): Query parameters of the submission.
+
+        Raises:
+            ValueError: If the content is not a valid input file or a query parameter is invalid.
+
+        Returns:
+            tuple: Job id and whether the job was already known.
+        """
+        settings = get_run_settings(query)
+        instance_id = hashlib.sha256(content.encode()).hexdigest()
+        if instance_id in self.instances:
+            self.instances.move_to_end(instance_id)
+        else:
+            self.instances[instance_id] = parse_instance(
+                content, instance_id[:12])
+            if len(self.instances) > MAX_CACHED_INSTANCES:
+                self.instances.popitem(last=False)
+
+        job_id = hashlib.sha256(
+            (instance_id + json.dumps(settings, sort_keys=True)).encode()).hexdigest()
+        if job_id in self.jobs and not self.jobs[job_id]['status'].startswith('failed'):
+            if job_id in self.finished_jobs:
+                self.finished_jobs.move_to_end(job_id)
+            return job_id, True
+
+        self.finished_jobs.pop(job_id, None)
+        self.jobs[job_id] = {'instance': instance_id, 'settings': settings,
+                             'status': 'running', 'scores': [], 'schedule': None}
+        future = asyncio.get_running_loop().run_in_executor(
+            self.pool, run_job, job_id, self.instances[instance_id], settings, self.updates)
+        asyncio.create_task(self.finish(job_id, future))
+        return job_id, False
+
+    async def finish(self, job_id, future):
+        """Mark a job as failed if its worker died before it could report the end of the job.
+
+        Args:
+            job_id (str): Job id.
+            future (asyncio.Future): Future of the worker run.
+        """
+        try:
+            await future
+        except Exception as error:
+            if self.jobs[job_id]['status'] == 'running':
+                self.jobs[job_id]['status'] = f'failed: {error!r}'
+                self.mark_finished(job_id)
+                await self.notify()
+
+    def get_summary(self, job_id):
+        """Get the status of a job.
+
+        Args:
+            job_id (str): Job id.
+
+        Returns:
+            dict: Instance id, run settings, job status, best score and score history.
+        """
+        job = self.jobs[job_id]
+        return {
+            'id': job_id,
+            'instance': job['instance'],
+            'settings': job['settings'],
+            'status': job['status'],
+            'best_score': job['scores'][-1] if job['scores'] else None,
+            'scores': job['scores']
+        }
+
+    async def handle_connection(self, reader, writer):
+        """Handle one HTTP request and close the connection."""
+        try:
+            request_line = (await reader.readline()).decode().split()
+            headers = {}
+            while True:
+                line = (await reader.readline()).decode().strip()
+                if not line:
+                    break
+                name, _, value = line.partition(':')
+                headers[name.strip().lower()] = value.strip()
+            try:
+                content_length = int(headers.get('content-length', 0))
+            except ValueError:
+                content_length = -1
+            if content_length < 0:
+                await self.respond(writer, 400, {'error': 'Invalid Content-Length header'})
+                return
+            body = await reader.readexactly(content_length)
+
+            if len(request_line) < 2:
+                await self.respond(writer, 400, {'error': 'Malformed request'})
+                return
+            method = request_line[0]
+            url = urllib.parse.urlsplit(request_line[1])
+            await self.route(writer, method, url.path.strip('/').split('/'),
+                             urllib.parse.parse_qs(url.query), body)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def route(self, writer, method, path, query, body):
+        """Dispatch a request to its route.
+
+        Args:
+            writer (asyncio.StreamWriter): Connection writer.
+            method (str): HTTP method.
+            path (list): Path segments.
+            query (dict): Query parameters.
+            body (bytes): Request body.
+        """
+        if path[0] != 'instances':
+            await self.respond(writer, 404, {'error': 'Unknown route'})
+            return
+
+        if len(path) == 1:
+            if method != 'POST':
+                await self.respond(writer, 405, {'error': 'Use POST to submit an instance'})
+                return
+            try:
+                job_id, cached = self.submit(body.decode(), query)
+            except (UnicodeDecodeError, ValueError) as error:
+                await self.respond(writer, 400, {'error': str(error)})
+                return
+            await self.respond(writer, 200 if cached else 201, {'id': job_id, 'cached': cached})
+            return
+
+        if path[1] not in self.jobs:
+            await self.respond(writer, 404, {'error': 'Unknown job'})
+        elif method != 'GET':
+            await self.respond(writer, 405, {'error': 'Use GET to query an instance'})
+        elif len(path) == 2:
+            await self.respond(writer, 200, self.get_summary(path[1]))
+        elif path[2] == 'schedule':
+            schedule = self.jobs[path[1]]['schedule']
+            if schedule is None:
+                await self.respond(writer, 404, {'error': 'No schedule yet'})
+            else:
+                await self.respond(writer, 200, schedule, 'text/plain')
+        elif path[2] == 'scores':
+            await self.stream_scores(writer, path[1])
+        else:
+            await self.respond(writer, 404, {'error': 'Unknown route'})
+
+    async def stream_scores(self, writer, job_id):
+        """Stream every new best score of a job as a JSON line until the job is done.
+
+        Args:
+            writer (asyncio.StreamWriter): Connection writer.
+            job_id (str): Job id.
+        """
+        writer.write(b'HTTP/1.1 200 OK\r\nContent-Type: application/x-ndjson\r\nConnection: close\r\n\r\n')
+        job = self.jobs[job_id]
+        sent = 0
+        while True:
+            for score in job['scores'][sent:]:
+                writer.write(json.dumps({'score': score}).encode() + b'\n')
+            sent = len(job['scores'])
+            await writer.drain()
+            if job['status'] != 'running':
+                writer.write(json.dumps(
+                    {'status': job['status']}).encode() + b'\n')
+                await writer.drain()
+                return
+            async with self.changed:
+                await self.changed.wait()
+
+    async def respond(self, writer, status, content, content_type='application/json'):
+        """Write a complete response.
+
+        Args:
+            writer (asyncio.StreamWriter): Connection writer.
+            status (int): HTTP status code.
+            content (dict or str): JSON content or text.
+            content_type (str, optional): Content type. Defaults to 'application/json'.
+        """
+        body = (json.dumps(content) if content_type ==
+                'application/json' else content).encode()
+        writer.write(f'HTTP/1.1 {status} {STATUS_REASONS[status]}\r\nContent-Type: {content_type}\r\n'
+                     f'Content-Length: {len(body)}\r\nConnection: close\r\n\r\n'.encode() + body)
+        await writer.drain()
+
+
+def serve(host, port, workers):
+    """Run the job server until interrupted.
+
+    Args:
+        host (str): Host to listen on.
+        port (int): Port to listen on.
+        workers (int): Maximum number of instances optimized at the same time.
+    """
+    try:
+        asyncio.run(JobServer(workers).serve(host, port))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,156 @@
+def get_features(solution, parent_score, max_score, street_demand, total_demand, duration):
+    """Get the surrogate features of a child, used to predict how much its score changes from its parent.
+
+    The schedule is summarized over all intersections instead of per intersection: features of only the
+    intersections a child changed ranked children worse, since the score change depends mostly on how good
+    the parent already is.
+
+    Args:
+        solution (list): Solution list containing the intersection schedules.
+        parent_score (int): Score of the parent.
+        max_score (int): Score if every car finished right away, used to scale the parent score.
+        street_demand (dict): Number of cars waiting at the end of each street.
+        total_demand (int): Sum of the street demands.
+        duration (int): Duration of simulation.
+
+    Returns:
+        list: Bias, demand-weighted green share, demand-weighted share of streets that never get green,
+            demand-weighted cycle length relative to the duration, share of scheduled intersections and
+            parent score relative to the maximum score.
+    """
+    green_share = 0
+    blocked = 0
+    cycle_length = 0
+    scheduled_intersections = 0
+    # Schedules know their cycle times, plain lists of intersections have them summed here
+    cycle_times = getattr(solution, 'cycle_times', None)
+    for i, intersection in enumerate(solution):
+        cycle_time = cycle_times[i] if cycle_times is not None else sum(
+            street['duration'] for street in intersection)
+        if cycle_time > 0:
+            scheduled_intersections += 1
+        for street in intersection:
+            demand = street_demand.get(street['street'], 0)
+            if not demand:
+                continue
+            if street['duration'] == 0:
+                blocked += demand
+            else:
+                green_share += demand * street['duration'] / cycle_time
+                cycle_length += demand * cycle_time
+
+    total_demand = max(total_demand, 1)
+    return [
+        1.0,
+        green_share / total_demand,
+        blocked / total_demand,
+        cycle_length / total_demand / duration,
+        scheduled_intersections / max(len(solution), 1),
+        parent_score / max(max_score, 1)
+    ]
+
+
+def get_ranking_accuracy(predictions, values):
+    """Get the share of pairs that the predictions put in the same order as the actual values.
+
+    Args:
+        predictions (list): Predicted values.
+        values (list): Actual values.
+
+    Returns:
+        float: Share of correctly ordered pairs among the pairs with different actual values, None if there are none.
+    """
+    correct = 0
+    pairs = 0
+    for i in range(len(values)):
+        for j in range(i + 1, len(values)):
+            if values[i] == values[j]:
+                continue
+            pairs += 1
+            if (predictions[i] - predictions[j]) * (values[i] - values[j]) > 0:
+                correct += 1
+    return correct / pairs if pairs else None
+
+
+class SurrogateModel:
+    """Linear model trained online by least squares from the simulations already done."""
+
+    def __init__(self, num_features, regularization=1e-6):
+        """Create an untrained surrogate model.
+
+        Args:
+            num_features (int): Number of features, including the bias.
+            regularization (float, optional): Ridge regularization relative to the feature scale. Defaults to 1e-6.
+        """
+        self.num_features = num_features
+        self.regularization = regularization
+        self.xtx = [[0.0] * num_features for _ in range(num_features)]
+        self.xty = [0.0] * num_features
+        self.samples = 0
+        self.weights = None
+
+    def is_ready(self):
+        """Check whether the model has seen enough simulations to be trusted.
+
+        Returns:
+            bool: True once there are at least two samples per feature.
+        """
+        return self.samples >= 2 * self.num_features
+
+    def add(self, features, score):
+        """Train the model with a simulated value, e.g. the score change of a child.
+
+        Args:
+            features (list): Features of the sample.
+            score (int): Simulated value of the sample.
+        """
+        for i in range(self.num_features):
+            for j in range(self.num_features):
+                self.xtx[i][j] += features[i] * features[j]
+            self.xty[i] += features[i] * score
+        self.samples += 1
+        self.weights = None
+
+    def predict(self, features):
+        """Predict the value of a sample.
+
+        Args:
+            features (list): Features of the sample.
+
+        Returns:
+            float: Predicted value.
+        """
+        if self.weights is None:
+            self.weights = self.fit()
+        return sum(weight * feature for weight, feature in zip(self.weights, features))
+
+    def fit(self):
+        """Solve the regularized normal equations by Gaussian elimination with partial pivoting.
+
+        Returns:
+            list: Model weights.
+        """
+        n = self.num_features
+        scale = max(max(self.xtx[i][i] for i in range(n)), 1.0)
+        matrix = [self.xtx[i][:] + [self.xty[i]] for i in range(n)]
+        for i in range(n):
+            matrix[i][i] += self.regularization * scale
+
+        for column in range(n):
+            pivot = max(range(column, n), key=lambda row: abs(matrix[row][column]))
+            matrix[column], matrix[pivot] = matrix[pivot], matrix[column]
+            if matrix[column][column] == 0:
+                continue
+            for row in range(column + 1, n):
+                factor = matrix[row][column] / matrix[column][column]
+                for k in range(column, n + 1):
+                    matrix[row][k] -= factor * matrix[column][k]
+
+        weights = [0.0] * n
+        for row in range(n - 1, -1, -1):
+            if matrix[row][row] == 0:
+                continue
+            remainder = matrix[row][n] - sum(matrix[row][k] * weights[k]
+                                             for k in range(row + 1, n))
+            weights[row] = remainder / matrix[row][row]
+        return weights
@@ -1,7 +1,13 @@
 import argparse
 import csv
+import os
 
+from batch import batch
+from benchmark import benchmark
 from experiments import experiment
+from generator import generate_instance
+from helper import get_rng
+from server import serve
 
 
 def read_csv():
@@ -20,20 +26,15 @@ def read_terminal():
     """Read command-line arguments or parameters using argparse.
 
     Returns:
-        tuple: A tuple containing the extracted values in the following order:
-            - population_size (int): Population size
-            - num_mutations (int): Number of mutations
-            - mutation_rate (float): Mutation rate
-            - inversion_rate (float): Inversion rate
-            - tournament (bool): Flag indicating whether tournament is enabled
-            - file_name (str): Input file name
+        argparse.Namespace: Arguments of a standard mode run, read by name, e.g. population_size, seed or file_name.
+        str: 'experimental', 'batch', 'server', 'generate' or 'benchmark' when the run was already executed in that mode.
     """
     parser = argparse.ArgumentParser(
         description='Process command-line arguments or parameters.')
 
     # Add arguments
     parser.add_argument(
-        '--mode', choices=['experimental', 'standard'], default='standard', help='Execution mode')
+        '--mode', choices=['experimental', 'standard', 'batch', 'server', 'generate', 'benchmark'], default='standard', help='Execution mode')
 
     # Standard mode arguments
     parser.add_argument('--population_size', type=int,
@@ -48,15 +49,69 @@ def read_terminal():
                         help='Enable tournament')
     parser.add_argument('--file_name', type=str,
                         default='', help='Input file name')
+    parser.add_argument('--seed', type=int, default=None,
+                        help='Seed for reproducible runs')
+    parser.add_argument('--generations', type=int, default=None,
+                        help='Number of generations to run instead of running until the time limit')
+    parser.add_argument('--short_cycles', action='store_true',
+                        help='Bias initial cycle times towards short, demand-proportional ones')
+    parser.add_argument('--surrogate_fraction', type=float, default=0.0,
+                        help='Fraction of offspring a surrogate model lets through to full simulation, 0 disables it')
+    parser.add_argument('--profile', action='store_true',
+                        help='Profile the run and write .pstats and collapsed stack files to data/profiles')
+    parser.add_argument('--profile_top', type=int, default=20,
+                        help='Number of functions to print when profiling')
+    parser.add_argument('--targeted_mutation', action='store_true',
+                        help='Mutate intersections in proportion to the car wait time at them')
+    parser.add_argument('--multi_objective', action='store_true',
+                        help='Optimize score, longest wait and longest cycle with NSGA-II')
+    parser.add_argument('--archive_size', type=int, default=10,
+                        help='Maximum number of solutions in the Pareto archive')
+    parser.add_argument('--seed_from', '--seed-from', nargs='+', default=[],
+                        help='Output files or results CSV files to seed the initial population with')
+    parser.add_argument('--seed_top', type=int, default=3,
+                        help='Number of best output files of the instance taken from each results CSV file')
     # Experimental mode arguments
     parser.add_argument('--config', type=str,
                         default='', help='Config file name')
+    # Batch mode arguments
+    parser.add_argument('--inputs', type=str, default='',
+                        help='Directory or glob pattern of input files')
+    parser.add_argument('--time_budget', type=float, default=0.0,
+                        help='Total time budget in seconds shared by all input files')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(),
+                        help='Number of worker processes')
+    # Server mode arguments
+    parser.add_argument('--host', type=str, default='127.0.0.1',
+                        help='Host the job server listens on')
+    parser.add_argument('--port', type=int, default=8080,
+                        help='Port the job server listens on')
+    # Generate mode arguments
+    parser.add_argument('--intersections', type=int, default=0,
+                        help='Number of intersections of the generated instance')
+    parser.add_argument('--streets', type=int, default=0,
+                        help='Number of streets of the generated instance')
+    parser.add_argument('--cars', type=int, default=0,
+                        help='Number of cars of the generated instance')
+    parser.add_argument('--duration', type=int, default=1000,
+                        help='Duration of simulation of the generated instances')
+    parser.add_argument('--bonus', type=int, default=1000,
+                        help='Bonus per car of the generated instance')
+    parser.add_argument('--min_path_length', type=int, default=2,
+                        help='Minimum number of streets per car path')
+    parser.add_argument('--max_path_length', type=int, default=20,
+                        help='Maximum number of streets per car path')
+    parser.add_argument('--max_street_length', type=int, default=10,
+                        help='Maximum street length in seconds')
+    # Benchmark mode arguments
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 200, 400, 800, 1600],
+                        help='Numbers of intersections of the benchmark instances')
 
     args = parser.parse_args()
 
     mode = args.mode
 
-    if mode == 'standard':
+    if mode in ('standard', 'batch'):
         population_size = args.population_size
         num_mutations = args.num_mutations
         mutation_rate = args.mutation_rate
@@ -77,23 +132,89 @@ def read_terminal():
         if not inversion_rate:
             parser.error('Inversion Rate should be set.')
 
-        if not file_name:
+        if not 0 <= args.surrogate_fraction <= 1:
+            parser.error('Surrogate Fraction should be between 0 and 1.')
+
+        if args.archive_size < 1:
+            parser.error('Archive Size should be at least 1.')
+
+        if mode == 'standard' and not file_name:
             parser.error('File Name should be set.')
 
+        if mode == 'batch' and not args.inputs:
+            parser.error('Inputs should be set.')
+
+        if args.generations is not None and args.generations < 1:
+            parser.error('Generations should be at least 1.')
+
+        if mode == 'batch' and not args.time_budget and args.generations is None:
+            parser.error('Time Budget should be set.')
+
+        if mode == 'batch' and args.workers < 1:
+            parser.error('Workers should be at least 1.')
+
         print("Population Size:", population_size)
         print("Number of Mutations:", num_mutations)
         print("Mutation Rate:", mutation_rate)
         print("Inversion Rate:", inversion_rate)
-        print("File Name:", file_name)
         print("Tournament:", tournament)
+        print("Seed:", args.seed)
+        print("Generations:", args.generations)
+        print("Short Cycles:", args.short_cycles)
+        print("Surrogate Fraction:", args.surrogate_fraction)
+        print("Profile:", args.profile)
+        print("Seed From:", args.seed_from)
+        print("Targeted Mutation:", args.targeted_mutation)
+        print("Multi Objective:", args.multi_objective)
+
+        if mode == 'batch':
+            print("Inputs:", args.inputs)
+            print("Time Budget:", args.time_budget)
+            print("Workers:", args.workers)
+            batch(args.inputs, (population_size, num_mutations, mutation_rate, inversion_rate, tournament),
+                  args.time_budget, args.workers, args.seed,
+                  {'short_cycles': args.short_cycles, 'surrogate_fraction': args.surrogate_fraction,
+                   'targeted_mutation': args.targeted_mutation, 'generations': args.generations})
+            return 'batch'
+
+        print("File Name:", file_name)
 
-        return population_size, num_mutations, mutation_rate, inversion_rate, tournament, file_name
+        return args
 
     elif mode == 'experimental':
         print("Execution Mode: Standard")
-        experiment(args.config)
+        if args.generations is not None and args.generations < 1:
+            parser.error('Generations should be at least 1.')
+        experiment(args.config, args.seed, args.profile,
+                   args.profile_top, args.generations)
         return 'experimental'
 
+    elif mode == 'server':
+        if args.workers < 1:
+            parser.error('Workers should be at least 1.')
+        serve(args.host, args.port, args.workers)
+        return 'server'
+
+    elif mode == 'generate':
+        if not args.file_name:
+            parser.error('File Name should be set.')
+        if not args.intersections or not args.streets or not args.cars:
+            parser.error('Intersections, Streets and Cars should be set.')
+        try:
+            generate_instance(args.file_name, args.intersections, args.streets, args.cars, args.duration,
+                              args.bonus, args.min_path_length, args.max_path_length, args.max_street_length,
+                              get_rng(args.seed))
+        except ValueError as error:
+            parser.error(str(error))
+        print("Instance written to", args.file_name)
+        return 'generate'
+
+    elif mode == 'benchmark':
+        if min(args.sizes) < 2:
+            parser.error('Sizes should be at least 2.')
+        benchmark(args.sizes, duration=args.duration, seed=args.seed)
+        return 'benchmark'
+
     else:
         parser.error(
-            "Invalid mode. Supported modes are 'experimental' and 'standard'.")
+            "Invalid mode. Supported modes are 'experimental', 'standard', 'batch', 'server', 'generate' and 'benchmark'.")
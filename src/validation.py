@@ -1,3 +1,6 @@
+from representation import Schedule
+
+
 def validate_solution(intersections, total_duration):
     """Validate Given Solution
 
@@ -9,8 +12,10 @@ def validate_solution(intersections, total_duration):
     Returns:
         str: Validation message
     """
-    total_sum = sum(sum(street['duration'] for street in intersection)
-                    for intersection in intersections)
+    if not isinstance(intersections, Schedule):
+        intersections = Schedule(intersections)
+
+    total_sum = intersections.total_duration
     if total_sum > total_duration:
         return "Total duration of simulation exceeded the limit."
     else: